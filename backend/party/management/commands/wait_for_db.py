@@ -1,16 +1,28 @@
+import random
 import time
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.db import connection
 from django.db.utils import OperationalError
 
+INITIAL_DELAY = 0.1
+MAX_DELAY = 30.0
+
 class Command(BaseCommand):
     """Wait for the database to be ready"""
 
+    def add_arguments(self, parser):
+        parser.add_argument('--timeout',
+                            type=float,
+                            default=600,
+                            help='Give up after this many seconds (default 600)')
+
     def handle(self, *args, **options):
         self.stdout.write('Waiting for database...')
 
+        deadline = time.monotonic() + options['timeout']
+        delay = INITIAL_DELAY
         while True:
             try:
                 connection.cursor()
@@ -20,7 +32,14 @@ class Command(BaseCommand):
                     db_name = settings.DATABASES['default']['NAME']
                     with connection._nodb_cursor() as cursor:
                         cursor.execute(f'CREATE DATABASE "{db_name}"')
-            self.stdout.write('Database unavailable, waiting 1 second...')
-            time.sleep(1)
+                    # database was just created, retry straight away
+                    continue
+
+            if time.monotonic() >= deadline:
+                raise CommandError(f"Database unavailable after {options['timeout']} seconds")
+
+            self.stdout.write(f'Database unavailable, waiting {delay:.1f} seconds...')
+            time.sleep(delay + random.uniform(0, delay * 0.2))
+            delay = min(delay * 2, MAX_DELAY)
 
         self.stdout.write(self.style.SUCCESS('Database is ready'))
@@ -0,0 +1,7 @@
+from reservations.permissions import FeatureEnabled
+
+
+class PartyFeatureEnabled(FeatureEnabled):
+    """Return 501 if party feature is disabled"""
+    feature = 'party'
+    message = 'Party feature is not enabled'
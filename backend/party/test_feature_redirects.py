@@ -35,8 +35,8 @@ class PartyFeatureRedirectTests(TestCase):
             description='Test Party'
         )
 
-    @patch('reservations.config.FEATURES', '')
-    @patch('party.views.logger')
+    @patch('reservations.config.FEATURES_SET', frozenset())
+    @patch('reservations.permissions.logger')
     def test_list_returns_501_when_feature_disabled(self, mock_logger):
         """Test that list endpoint returns 501 when party feature is disabled."""
         request = self.factory.get('/api/party/')
@@ -51,8 +51,8 @@ class PartyFeatureRedirectTests(TestCase):
         log_message = mock_logger.warning.call_args[0][0]
         self.assertIn('party', log_message.lower())
 
-    @patch('reservations.config.FEATURES', '')
-    @patch('party.views.logger')
+    @patch('reservations.config.FEATURES_SET', frozenset())
+    @patch('reservations.permissions.logger')
     def test_retrieve_returns_501_when_feature_disabled(self, mock_logger):
         """Test that retrieve endpoint returns 501 when party feature is disabled."""
         request = self.factory.get(f'/api/party/{self.party.room_number}/')
@@ -61,8 +61,8 @@ class PartyFeatureRedirectTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
         mock_logger.warning.assert_called_once()
 
-    @patch('reservations.config.FEATURES', '')
-    @patch('party.views.logger')
+    @patch('reservations.config.FEATURES_SET', frozenset())
+    @patch('reservations.permissions.logger')
     def test_create_returns_501_when_feature_disabled(self, mock_logger):
         """Test that create endpoint returns 501 when party feature is disabled."""
         request = self.factory.post('/api/party/', {
@@ -74,8 +74,8 @@ class PartyFeatureRedirectTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
         mock_logger.warning.assert_called_once()
 
-    @patch('reservations.config.FEATURES', '')
-    @patch('party.views.logger')
+    @patch('reservations.config.FEATURES_SET', frozenset())
+    @patch('reservations.permissions.logger')
     def test_update_returns_501_when_feature_disabled(self, mock_logger):
         """Test that update endpoint returns 501 when party feature is disabled."""
         request = self.factory.put(f'/api/party/{self.party.room_number}/', {
@@ -87,8 +87,8 @@ class PartyFeatureRedirectTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
         mock_logger.warning.assert_called_once()
 
-    @patch('reservations.config.FEATURES', '')
-    @patch('party.views.logger')
+    @patch('reservations.config.FEATURES_SET', frozenset())
+    @patch('reservations.permissions.logger')
     def test_destroy_returns_501_when_feature_disabled(self, mock_logger):
         """Test that destroy endpoint returns 501 when party feature is disabled."""
         request = self.factory.delete(f'/api/party/{self.party.room_number}/')
@@ -97,7 +97,7 @@ class PartyFeatureRedirectTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
         mock_logger.warning.assert_called_once()
 
-    @patch('reservations.config.FEATURES', 'party')
+    @patch('reservations.config.FEATURES_SET', frozenset(['party']))
     def test_list_works_when_feature_enabled(self):
         """Test that list endpoint works normally when party feature is enabled."""
         request = self.factory.get('/api/party/')
@@ -106,7 +106,7 @@ class PartyFeatureRedirectTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertGreaterEqual(len(response.data), 1)
 
-    @patch('reservations.config.FEATURES', 'party')
+    @patch('reservations.config.FEATURES_SET', frozenset(['party']))
     def test_retrieve_works_when_feature_enabled(self):
         """Test that retrieve endpoint works normally when party feature is enabled."""
         request = self.factory.get(f'/api/party/{self.party.room_number}/')
@@ -114,3 +114,13 @@ class PartyFeatureRedirectTests(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['room_number'], '1234')
+
+    @patch('reservations.config.FEATURES_SET', frozenset(['third-party']))
+    @patch('reservations.permissions.logger')
+    def test_list_returns_501_for_partial_feature_name(self, mock_logger):
+        """Test that a feature name containing 'party' does not enable the party feature."""
+        request = self.factory.get('/api/party/')
+        response = self.viewset(request)
+
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+        mock_logger.warning.assert_called_once()
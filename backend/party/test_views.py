@@ -0,0 +1,122 @@
+"""
+Unit tests for the party endpoints.
+
+Tests that party creation and removal:
+- Requires the name or email of the room owner as a secret
+- Accepts both JSON and form encoded requests
+"""
+
+from unittest.mock import patch
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+from rest_framework import status
+from party.views import PartyViewSet
+from party.models import Party
+from reservations.models import Room, Guest
+
+
+@patch('reservations.config.FEATURES_SET', frozenset(['party']))
+class PartyViewTests(TestCase):
+    """Test the secret handling for party endpoints."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.factory = APIRequestFactory()
+        self.viewset = PartyViewSet.as_view({'get': 'list', 'post': 'create'})
+        self.detail_viewset = PartyViewSet.as_view({'delete': 'destroy'})
+
+        self.guest = Guest.objects.create(name='Party Person',
+                                          email='party@example.com',
+                                          ticket='T100')
+        self.room = Room.objects.create(number='500',
+                                        name_take3='King',
+                                        name_hotel='Ballys',
+                                        primary='Party Person',
+                                        secondary='',
+                                        guest=self.guest)
+
+    def test_create_with_owner_name(self):
+        """Test that a party can be created using the room owner's name."""
+        request = self.factory.post('/api/party/', {
+            'room_number': '500',
+            'description': 'New Party',
+            'secret': 'party person'
+        }, format='json')
+        response = self.viewset(request)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'room_number': '500', 'description': 'New Party'})
+        self.assertTrue(Party.objects.filter(room_number='500').exists())
+
+    def test_create_with_form_data(self):
+        """Test that a form encoded request with the owner's email creates a party."""
+        request = self.factory.post('/api/party/', {
+            'room_number': '500',
+            'description': 'New Party',
+            'secret': 'PARTY@example.com'
+        })
+        response = self.viewset(request)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Party.objects.filter(room_number='500').exists())
+
+    def test_create_without_secret(self):
+        """Test that a missing secret is rejected."""
+        request = self.factory.post('/api/party/', {
+            'room_number': '500',
+            'description': 'New Party'
+        }, format='json')
+        response = self.viewset(request)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(Party.objects.exists())
+
+    def test_create_with_wrong_secret(self):
+        """Test that a secret which matches neither name nor email is rejected."""
+        request = self.factory.post('/api/party/', {
+            'room_number': '500',
+            'description': 'New Party',
+            'secret': 'someone else'
+        }, format='json')
+        response = self.viewset(request)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Party.objects.exists())
+
+    def test_create_unknown_room(self):
+        """Test that a party can only be created for an existing room."""
+        request = self.factory.post('/api/party/', {
+            'room_number': '501',
+            'description': 'New Party',
+            'secret': 'party person'
+        }, format='json')
+        response = self.viewset(request)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_destroy_with_owner_email(self):
+        """Test that a party can be removed using the room owner's email."""
+        Party.objects.create(room_number='500', description='Old Party')
+        request = self.factory.delete('/api/party/500/', {'secret': 'party@example.com'}, format='json')
+        response = self.detail_viewset(request, room_number='500')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(Party.objects.exists())
+
+    def test_destroy_with_wrong_secret(self):
+        """Test that a party is not removed with the wrong secret."""
+        Party.objects.create(room_number='500', description='Old Party')
+        request = self.factory.delete('/api/party/500/', {'secret': 'nope'}, format='json')
+        response = self.detail_viewset(request, room_number='500')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(Party.objects.exists())
+
+    def test_destroy_without_secret(self):
+        """Test that a party is not removed without a secret."""
+        Party.objects.create(room_number='500', description='Old Party')
+        request = self.factory.delete('/api/party/500/', format='json')
+        response = self.detail_viewset(request, room_number='500')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(Party.objects.exists())
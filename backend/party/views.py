@@ -8,49 +8,35 @@ from party.models import Party
 from reservations.models import Room
 from rest_framework import viewsets
 from party.serializers import PartySerializer
+from party.permissions import PartyFeatureEnabled
 import reservations.config as roombaht_config
 
 logging.basicConfig(stream=sys.stdout, level=roombaht_config.LOGLEVEL)
 logger = logging.getLogger('ViewLogger_party')
 
+def secret_mismatch(secret, room):
+    """True unless the secret is part of the primary name or is the room owner's email"""
+    secret = secret.lower()
+    if secret in room.primary.lower():
+        return False
+
+    return room.guest is not None and secret != room.guest.email.lower()
+
 class PartyViewSet(viewsets.ModelViewSet):
     queryset = Party.objects.all()
     serializer_class = PartySerializer
     lookup_field = 'room_number'
-
-    def _check_feature_enabled(self):
-        """Return 501 if party feature is disabled"""
-        if 'party' not in roombaht_config.FEATURES:
-            logger.warning("Access attempt to disabled feature: party")
-            return Response(
-                {'error': 'Party feature is not enabled'},
-                status=status.HTTP_501_NOT_IMPLEMENTED
-            )
-        return None
-
-    def list(self, request, *args, **kwargs):
-        error = self._check_feature_enabled()
-        if error:
-            return error
-        return super().list(request, *args, **kwargs)
-
-    def retrieve(self, request, *args, **kwargs):
-        error = self._check_feature_enabled()
-        if error:
-            return error
-        return super().retrieve(request, *args, **kwargs)
+    permission_classes = [PartyFeatureEnabled]
 
     def create(self, request, *args, **kwargs):
-        error = self._check_feature_enabled()
-        if error:
-            return error
-
-        room_number = request.data['room_number']
-        secret = request.data['secret']
+        # work on a copy as request.data may be an immutable QueryDict
+        data = request.data.copy()
+        secret = data.get('secret')
         if secret is None:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
 
-        del request.data['secret']
+        data.pop('secret', None)
+        room_number = data.get('room_number')
 
         # we allow looking up the room by
         # * email
@@ -58,34 +44,26 @@ class PartyViewSet(viewsets.ModelViewSet):
         room = None
         try:
             room = Room.objects.get(name_hotel='Ballys', number=room_number)
-            if secret.lower() not in room.primary.lower() and \
-               (room.guest is not None and (secret.lower() != room.guest.email.lower())):
+            if secret_mismatch(secret, room):
                 return Response('Must specify the email or name of the room owner', status=status.HTTP_400_BAD_REQUEST)
 
         except Room.DoesNotExist:
             return Response("This room does not exist - is it in Bally's?", status=status.HTTP_400_BAD_REQUEST)
 
-        return super().create(request, *args, **kwargs)
-
-    def update(self, request, *args, **kwargs):
-        error = self._check_feature_enabled()
-        if error:
-            return error
-        return super().update(request, *args, **kwargs)
+        serializer = self.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     def destroy(self, request, *args, **kwargs):
-        error = self._check_feature_enabled()
-        if error:
-            return error
-
         existing = self.get_object()
-        secret = request.data['secret']
-        room = Room.objects.get(name_hotel = 'Ballys', number=existing.room_number)
+        secret = request.data.get('secret')
         if secret is None:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
 
-        if secret.lower() not in room.primary.lower() and \
-               (room.guest is not None and (secret.lower() != room.guest.email.lower())):
+        room = Room.objects.get(name_hotel = 'Ballys', number=existing.room_number)
+        if secret_mismatch(secret, room):
             return Response(status=status.HTTP_401_UNAUTHORIZED)
 
         existing.delete()
@@ -83,7 +83,7 @@ def do_reset(guests):
 
 def reset_otp(email):
     guests = Guest.objects.filter(email=email, can_login=True)
-    if guests.count() > 0:
+    if guests.exists():
         do_reset(guests)
         return
 
@@ -1,4 +1,6 @@
-from fuzzywuzzy import fuzz
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connections
+from rapidfuzz import fuzz
 from reservations.models import Guest
 import reservations.config as roombaht_config
 
@@ -6,12 +8,18 @@ def room_guest_name_mismatch(room):
     if not room.guest:
         return False
 
+    # rapidfuzz scores are floats; round them like the other call sites so the
+    # integer threshold behaves as it did under fuzzywuzzy
     for name in room.occupants():
-        if fuzz.ratio(room.guest.name, name) >= roombaht_config.NAME_FUZZ_FACTOR:
+        if round(fuzz.ratio(room.guest.name, name)) >= roombaht_config.NAME_FUZZ_FACTOR:
             return False
 
     return True
 
+def get_transferred_tickets():
+    """Tickets which have been transferred on to another guest"""
+    return set(Guest.objects.filter(transfer__gt='').values_list('transfer', flat=True))
+
 def ticket_chain(p_guest):
     if not p_guest.transfer or p_guest.transfer == '':
         return [p_guest]
@@ -23,3 +31,18 @@ def ticket_chain(p_guest):
     forward_chain = Guest.chain(p_guest.transfer)
     combined = [p_guest] + forward_chain
     return list(reversed(combined))
+
+def run_parallel(checks, app_configs, **kwargs):
+    """Run independent checks on a thread pool, returning their combined results in order"""
+    def run(check):
+        try:
+            return check(app_configs, **kwargs)
+        finally:
+            # each worker thread opens its own database connection
+            connections.close_all()
+
+    if not checks:
+        return []
+
+    with ThreadPoolExecutor(max_workers=len(checks)) as pool:
+        return [error for errors in pool.map(run, checks) for error in errors]
@@ -0,0 +1,19 @@
+from django.core.checks import register, Tags
+from reservations.checks import run_parallel
+from reservations.checks.room import room_drama_check
+from reservations.checks.user import guest_drama_check, intermediate_transfer_guest_check
+from reservations.checks.secret_party import secret_party_data_check, secret_party_refunded_check
+
+RESERVATION_CHECKS = [
+    room_drama_check,
+    guest_drama_check,
+    intermediate_transfer_guest_check,
+    secret_party_data_check,
+    secret_party_refunded_check
+]
+
+@register(Tags.database, deploy=True)
+def reservations_check(app_configs, **kwargs):
+    """The reservation checks are independent, and the secret party ones wait on
+    the network, so run them alongside each other rather than one after another"""
+    return run_parallel(RESERVATION_CHECKS, app_configs, **kwargs)
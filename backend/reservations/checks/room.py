@@ -1,46 +1,66 @@
-from django.core.checks import Error, Warning, register, Tags
+from collections import defaultdict
+from django.core.checks import Error, Warning
 from reservations.models import Room, Guest
 from reservations.checks import room_guest_name_mismatch
-from django.core.exceptions import MultipleObjectsReturned
 
 
-@register(Tags.database, deploy=True)
 def room_drama_check(app_configs, **kwargs):
     errors = []
-    rooms = Room.objects.all()
-    for room in rooms:
+    # occupants() only reads primary/secondary, so the guest is the only
+    # relation room_guest_name_mismatch needs loaded
+    rooms = Room.objects.select_related('guest').only('id', 'number', 'name_hotel', 'primary', 'secondary',
+                                                      'sp_ticket_id', '_check_in', '_check_out',
+                                                      'guest__id', 'guest__name', 'guest__email',
+                                                      'guest__hotel', 'guest__room_number')
+
+    # look up the original owners and transfer recipients of every placed
+    # room ticket up front, rather than once per room
+    sp_tickets = Room.objects.exclude(sp_ticket_id__isnull=True) \
+                             .exclude(sp_ticket_id='') \
+                             .values('sp_ticket_id')
+    guests_by_ticket = defaultdict(list)
+    for guest in Guest.objects.filter(ticket__in=sp_tickets).only('id', 'name', 'ticket', 'room_number'):
+        guests_by_ticket[guest.ticket].append(guest)
+
+    guests_by_transfer = defaultdict(list)
+    for guest in Guest.objects.filter(transfer__in=sp_tickets).only('id', 'name', 'ticket', 'transfer', 'room_number'):
+        guests_by_transfer[guest.transfer].append(guest)
+
+    # rooms are only read once, so stream them rather than caching the whole table
+    for room in rooms.iterator(chunk_size=500):
         # for every room, if there is a guest, make sure the number
         # on the guest record matches the actual room number
         if room.guest and room.number != room.guest.room_number:
             errors.append(Error(f"Room/guest number mismatch {room.name_hotel} {room.number} / {room.guest.email} {room.guest.hotel} {room.guest.room_number}",
                                 hint='Attempt room_fix or manual reconciliation', obj=room))
 
-        if room_guest_name_mismatch(room):
+        # the fuzzy name match is the expensive part of this loop, only do it once
+        name_mismatch = room_guest_name_mismatch(room)
+        if name_mismatch:
             errors.append(Error(f"Room/guest name mismatch {room.name_hotel} {room.number} {room.primary} / {room.guest.name}",
                                 hint='Attempt room_fix or manual reconciliation', obj=room))
 
         # side effect of transferring placed rooms
         if room.sp_ticket_id:
             guest = None
-            alt_msg = ''
-            try:
-                guest = Guest.objects.get(ticket=room.sp_ticket_id)
+            ticket_guests = guests_by_ticket.get(room.sp_ticket_id, [])
+            if len(ticket_guests) == 0:
+                errors.append(Error(f"Original owner of {room.name_hotel} {room.number} with ticket {room.sp_ticket_id} not found",
+                                    hint='Might go away on a SP import, might not. Good luck, I guess?', obj=room))
+            elif len(ticket_guests) > 1:
+                errors.append(Error(f"Multiple guests found with ticket {room.sp_ticket_id} for room {room.name_hotel} {room.number}",
+                                    hint='Database corruption - manual reconciliation required', obj=room))
+            else:
+                guest = ticket_guests[0]
                 if room.number != guest.room_number:
                     errors.append(Error(f"Ticket {room.sp_ticket_id} room/guest number mismatch {room.number} / {guest.room_number}",
                                         hint='Attempt room_fix or manual reconcliation', obj=room))
 
-                if room_guest_name_mismatch(room):
+                if name_mismatch:
                     errors.append(Error(f"Room {room.name_hotel} {room.number} {room.sp_ticket_id} room/guest name mismatch {room.primary} / {guest.name}",
                                         hint='Attempt room_fix or manual reconcliation',
                                         obj=room))
 
-            except Guest.DoesNotExist:
-                errors.append(Error(f"Original owner of {room.name_hotel} {room.number} with ticket {room.sp_ticket_id} not found",
-                                    hint='Might go away on a SP import, might not. Good luck, I guess?', obj=room))
-            except MultipleObjectsReturned:
-                errors.append(Error(f"Multiple guests found with ticket {room.sp_ticket_id} for room {room.name_hotel} {room.number}",
-                                    hint='Database corruption - manual reconciliation required', obj=room))
-
             if room.guest is None:
                 errors.append(Error(f"Room {room.number} ({room.name_hotel}) sp_ticket_id {room.sp_ticket_id} missing guest",
                                     hint='Attempt room_fix or manual reconciliation', obj=room))
@@ -48,8 +68,15 @@ def room_drama_check(app_configs, **kwargs):
             if room.guest is not None and room.number != room.guest.room_number \
                and room.primary != room.guest.name \
                    and guest is not None:
-                try:
-                    guest = Guest.objects.get(transfer=room.sp_ticket_id)
+                transfer_guests = guests_by_transfer.get(room.sp_ticket_id, [])
+                if len(transfer_guests) == 0:
+                    errors.append(Error(f"Room {room.number} ({room.name_hotel}) Ticket {room.sp_ticket_id} transfer owner not found",
+                                        hint='Good luck, I guess?', obj=room))
+                elif len(transfer_guests) > 1:
+                    errors.append(Error(f"Multiple guests found with transfer={room.sp_ticket_id} for room {room.name_hotel} {room.number}",
+                                        hint='Database corruption - manual reconciliation required', obj=room))
+                else:
+                    guest = transfer_guests[0]
                     if room.number != guest.room_number:
                         errors.append(Error(f"Room {room.number} ({room.name_hotel}) Ticket {room.sp_ticket_id} transfer {guest.ticket} room/guest number mismatch {room.number} / {guest.room_number}",
                                             hint='Manually reconcile room/guest numbers for specified ticket(s)',
@@ -59,13 +86,6 @@ def room_drama_check(app_configs, **kwargs):
                         errors.append(Error(f"Room {room.number} ({room.name_hotel}) Ticket {room.sp_ticket_id} transfer {guest.ticket} room/guest name mismatch {room.primary} / {guest.name}",
                                             hint='Manually reconcile room/guest names for specified ticket(s)', obj=room))
 
-                except Guest.DoesNotExist:
-                    errors.append(Error(f"Room {room.number} ({room.name_hotel}) Ticket {room.sp_ticket_id} transfer owner not found",
-                                        hint='Good luck, I guess?', obj=room))
-                except MultipleObjectsReturned:
-                    errors.append(Error(f"Multiple guests found with transfer={room.sp_ticket_id} for room {room.name_hotel} {room.number}",
-                                        hint='Database corruption - manual reconciliation required', obj=room))
-
         # general corruption which could bubble up during orm/sql manipulation
         missing = []
         if room.check_in is None:
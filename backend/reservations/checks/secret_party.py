@@ -1,30 +1,74 @@
-from django.core.checks import Error, Warning, Info, register, Tags
+import logging
+from collections import defaultdict
+from django.core.checks import Error, Warning
+from django.db.models import Count
 from reservations.models import Room, Guest
 from reservations import config as roombaht_config
-from reservations.constants import ROOM_LIST
+from reservations.constants import ROOM_PRODUCTS
 from reservations.secret_party import SecretPartyClient
 from reservations.ingest_models import SecretPartyGuestIngest
+from reservations.checks import get_transferred_tickets
+
+logger = logging.getLogger(__name__)
+
+_SP_CLIENT = None
+
+def sp_client():
+    """Share one client, and with it one HTTP session, between check runs"""
+    global _SP_CLIENT
+    api_key = roombaht_config.SP_API_KEY if roombaht_config.SP_API_KEY else None
+    if _SP_CLIENT is None or _SP_CLIENT.api_key != api_key:
+        _SP_CLIENT = SecretPartyClient(api_key=api_key)
+
+    return _SP_CLIENT
+
+
+def maybe_room_ticket(ticket_data):
+    """Cheap look at the raw export so ingest models are only built for tickets
+    which could be room products. Anything malformed is let through so the
+    ingest model can complain about it"""
+    try:
+        return ticket_data['product']['name'] in ROOM_PRODUCTS
+    except (KeyError, TypeError):
+        return True
+
+
+def parse_room_tickets(sp_data, label):
+    """Build ingest models for the room product tickets in a Secret Party export,
+    returning them along with a Warning for each ticket which failed to parse"""
+    room_tickets = []
+    errors = []
+    for ticket_data in sp_data:
+        if not maybe_room_ticket(ticket_data):
+            continue
+
+        try:
+            guest_obj = SecretPartyGuestIngest.from_source(ticket_data, source_type='json')
+        except Exception as e:
+            errors.append(Warning(
+                f"Error processing {label} ticket data: {e}",
+                hint="Check data format and ingestion models"
+            ))
+            continue
+
+        if guest_obj.product in ROOM_PRODUCTS:
+            room_tickets.append(guest_obj)
+
+    return room_tickets, errors
 
 
-@register(Tags.database, deploy=True)
 def secret_party_data_check(app_configs, **kwargs):
     """Check database state against Secret Party source data to detect missing room assignments."""
 
     if not roombaht_config.SP_SYSTEM_CHECKS:
-        return [Info("Skipping secret party data check",
-                     hint='This check does not run in tests or CI')]
+        logger.debug("Skipping secret party data check, SP_SYSTEM_CHECKS is disabled")
+        return []
 
     errors = []
 
-    # Build set of all room product names from ROOM_LIST
-    room_products = set()
-    for room_type, room_data in ROOM_LIST.items():
-        room_products.update(room_data['rooms'])
-
     # Use SecretPartyClient with cache support
     # Initialize without API key first - will use cache if available
-    api_key = roombaht_config.SP_API_KEY if roombaht_config.SP_API_KEY else None
-    client = SecretPartyClient(api_key=api_key)
+    client = sp_client()
 
     try:
         # Try to get data - will use cache if available, otherwise fetch from API
@@ -49,61 +93,61 @@ def secret_party_data_check(app_configs, **kwargs):
         return errors
 
     # Process Secret Party data and compare with database
-    transferred_tickets = set(Guest.objects.exclude(transfer='').exclude(transfer__isnull=True).values_list('transfer', flat=True))
+    transferred_tickets = get_transferred_tickets()
 
-    for ticket_data in sp_data:
-        try:
-            guest_obj = SecretPartyGuestIngest.from_source(ticket_data, source_type='json')
+    parsed, parse_errors = parse_room_tickets(sp_data, "Secret Party")
+    errors.extend(parse_errors)
 
-            # Skip if not a room product
-            if guest_obj.product not in room_products:
-                continue
-
-            ticket_code = guest_obj.ticket_code
-
-            # Check if this ticket was transferred away (intermediate in chain)
-            if ticket_code in transferred_tickets:
-                continue  # Intermediate guests shouldn't have rooms
-
-            # This is a tail guest with a room product - they should have a room assignment
-            try:
-                guest = Guest.objects.get(ticket=ticket_code)
-
-                # Check if they have a room assigned
-                if guest.room_number is None and guest.room_set.count() == 0:
-                    errors.append(Error(
-                        f"(ticket {ticket_code}) has room product '{guest_obj.product}' in Secret Party but no room assigned in database",
-                        hint="Consider re-running ingestion or user_fix command.",
-                        obj=guest
-                    ))
-                elif guest.room_number is not None and guest.room_set.count() == 0:
-                    errors.append(Error(
-                        f"(ticket {ticket_code}) has room_number='{guest.room_number}' but no Room object with associated guest",
-                        hint="Consider using room_fix or manual reconcilliation",
-                        obj=guest
-                    ))
-
-            except Guest.DoesNotExist:
-                errors.append(Warning(
-                    f"Ticket {ticket_code} with room product '{guest_obj.product}' exists in Secret Party but not in database",
-                    hint="Fetch secret party data via command or admin page."
-                ))
-            except Guest.MultipleObjectsReturned:
-                errors.append(Error(
-                    f"Multiple Guest records found for ticket {ticket_code}",
-                    hint="Manual reconcilliation. Good luck, starfighter."
-                ))
+    # Skip tickets which were transferred away (intermediate in chain),
+    # intermediate guests shouldn't have rooms
+    room_tickets = [x for x in parsed if x.ticket_code not in transferred_tickets]
 
-        except Exception as e:
+    # Fetch every guest holding one of these tickets, with their room count, in one go
+    candidates = Guest.objects.filter(ticket__in=[x.ticket_code for x in room_tickets]) \
+                              .only('id', 'name', 'ticket', 'room_number') \
+                              .annotate(room_count=Count('room'))
+    guests_by_ticket = defaultdict(list)
+    for guest in candidates:
+        guests_by_ticket[guest.ticket].append(guest)
+
+    for guest_obj in room_tickets:
+        ticket_code = guest_obj.ticket_code
+        ticket_guests = guests_by_ticket.get(ticket_code, [])
+
+        # This is a tail guest with a room product - they should have a room assignment
+        if len(ticket_guests) == 0:
             errors.append(Warning(
-                f"Error processing Secret Party ticket data: {e}",
-                hint="Check data format and ingestion models"
+                f"Ticket {ticket_code} with room product '{guest_obj.product}' exists in Secret Party but not in database",
+                hint="Fetch secret party data via command or admin page."
+            ))
+            continue
+
+        if len(ticket_guests) > 1:
+            errors.append(Error(
+                f"Multiple Guest records found for ticket {ticket_code}",
+                hint="Manual reconcilliation. Good luck, starfighter."
+            ))
+            continue
+
+        guest = ticket_guests[0]
+
+        # Check if they have a room assigned
+        if guest.room_number is None and guest.room_count == 0:
+            errors.append(Error(
+                f"(ticket {ticket_code}) has room product '{guest_obj.product}' in Secret Party but no room assigned in database",
+                hint="Consider re-running ingestion or user_fix command.",
+                obj=guest
+            ))
+        elif guest.room_number is not None and guest.room_count == 0:
+            errors.append(Error(
+                f"(ticket {ticket_code}) has room_number='{guest.room_number}' but no Room object with associated guest",
+                hint="Consider using room_fix or manual reconcilliation",
+                obj=guest
             ))
 
     return errors
 
 
-@register(Tags.database, deploy=True)
 def secret_party_refunded_check(app_configs, **kwargs):
     """Check for refunded Secret Party products that still have a room assigned.
 
@@ -113,18 +157,12 @@ def secret_party_refunded_check(app_configs, **kwargs):
     """
 
     if not roombaht_config.SP_SYSTEM_CHECKS:
-        return [Info("Skipping secret party refunded check",
-                     hint='This check does not run in tests or CI')]
+        logger.debug("Skipping secret party refunded check, SP_SYSTEM_CHECKS is disabled")
+        return []
 
     errors = []
 
-    # Build set of all room product names from ROOM_LIST
-    room_products = set()
-    for room_type, room_data in ROOM_LIST.items():
-        room_products.update(room_data['rooms'])
-
-    api_key = roombaht_config.SP_API_KEY if roombaht_config.SP_API_KEY else None
-    client = SecretPartyClient(api_key=api_key)
+    client = sp_client()
 
     try:
         refunded_data = client.export_tickets(order="last_name",
@@ -143,43 +181,39 @@ def secret_party_refunded_check(app_configs, **kwargs):
             ))
         return errors
 
-    for ticket_data in refunded_data:
-        try:
-            guest_obj = SecretPartyGuestIngest.from_source(ticket_data, source_type='json')
+    parsed, parse_errors = parse_room_tickets(refunded_data, "refunded Secret Party")
+    errors.extend(parse_errors)
+    refunded_tickets = [x.ticket_code for x in parsed]
 
-            # Only care about room products
-            if guest_obj.product not in room_products:
-                continue
+    candidates = Guest.objects.filter(ticket__in=refunded_tickets) \
+                              .only('id', 'name', 'ticket', 'room_number') \
+                              .annotate(room_count=Count('room'))
+    guests_by_ticket = defaultdict(list)
+    for guest in candidates:
+        guests_by_ticket[guest.ticket].append(guest)
 
-            ticket_code = guest_obj.ticket_code
+    for ticket_code in refunded_tickets:
+        ticket_guests = guests_by_ticket.get(ticket_code, [])
 
-            try:
-                guest = Guest.objects.get(ticket=ticket_code)
+        # If we don't have the guest in DB, nothing to do
+        if len(ticket_guests) == 0:
+            continue
 
-                # If guest still has any room association, that's an error
-                has_room_number = bool(guest.room_number)
-                has_room_obj = guest.room_set.count() > 0
-
-                if has_room_number or has_room_obj:
-                    errors.append(Error(
-                        f"Refunded ticket {ticket_code} still has a room assigned (room_number='{guest.room_number}')",
-                        hint="Consider using user_fix to unassign room",
-                        obj=guest
-                    ))
+        if len(ticket_guests) > 1:
+            errors.append(Error(
+                f"Multiple Guest records found for refunded ticket {ticket_code}",
+                hint="Manual reconcilliation. Good luck, starfighter."
+            ))
+            continue
 
-            except Guest.DoesNotExist:
-                # If we don't have the guest in DB, nothing to do
-                continue
-            except Guest.MultipleObjectsReturned:
-                errors.append(Error(
-                    f"Multiple Guest records found for refunded ticket {ticket_code}",
-                    hint="Manual reconcilliation. Good luck, starfighter."
-                ))
+        guest = ticket_guests[0]
 
-        except Exception as e:
-            errors.append(Warning(
-                f"Error processing refunded Secret Party ticket data: {e}",
-                hint="Check data format and ingestion models"
+        # If guest still has any room association, that's an error
+        if guest.room_number or guest.room_count > 0:
+            errors.append(Error(
+                f"Refunded ticket {ticket_code} still has a room assigned (room_number='{guest.room_number}')",
+                hint="Consider using user_fix to unassign room",
+                obj=guest
             ))
 
     return errors
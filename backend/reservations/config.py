@@ -34,12 +34,16 @@ GUEST_HOTELS = env_config('guest_hotels', 'Ballys,Nugget').split(',')
 VISIBLE_HOTELS = env_config('visible_hotels', 'Ballys,Nugget').split(',')
 
 FEATURES = env_config('features', '').split(',')
+FEATURES_SET = frozenset(x.strip() for x in FEATURES if x.strip())
 
 ROOM_COOLDOWN = int(env_config('room_cooldown', '30'))
 SWAP_CODE_LIFE = int(env_config('swap_code_life', '3600'))
 
 SP_API_KEY = env_config('sp_api_key')
 
+# rows per statement when management commands write changes in bulk
+BULK_BATCH_SIZE = int(env_config('bulk_batch_size', '500'))
+
 # set the global default for fuzzy name matching. this may be overridden in some managment commands
 NAME_FUZZ_FACTOR = int(env_config('name_fuzz_factor', '75'))
 
@@ -118,32 +118,20 @@ ROOM_LIST = {
     }
 }
 
+def _ordinal(n):
+    if 10 <= n % 100 <= 20:
+        return f"{n}th"
+    return f"{n}{ {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')}"
+
+def _floorplans(hotel, floors):
+    """Full size and thumbnail layout images for each floor, e.g. ballys_3rd.png"""
+    return {floor: [f"{hotel}_{_ordinal(floor)}.png", f"{hotel}_{_ordinal(floor)}_thumb.png"]
+            for floor in floors}
+
 FLOORPLANS = {
-    'ballys': {
-        3: ["ballys_3rd.png", "ballys_3rd_thumb.png"],
-        4: ["ballys_4th.png", "ballys_4th_thumb.png"],
-        5: ["ballys_5th.png", "ballys_5th_thumb.png"],
-        6: ["ballys_6th.png", "ballys_6th_thumb.png"],
-        7: ["ballys_7th.png", "ballys_7th_thumb.png"],
-        8: ["ballys_8th.png", "ballys_8th_thumb.png"],
-        9: ["ballys_9th.png", "ballys_9th_thumb.png"],
-        10: ["ballys_10th.png", "ballys_10th_thumb.png"],
-        11: ["ballys_11th.png", "ballys_11th_thumb.png"],
-        12: ["ballys_12th.png", "ballys_12th_thumb.png"],
-        13: ["ballys_13th.png", "ballys_13th_thumb.png"],
-        14: ["ballys_14th.png", "ballys_14th_thumb.png"],
-        15: ["ballys_15th.png", "ballys_15th_thumb.png"],
-        16: ["ballys_16th.png", "ballys_16th_thumb.png"],
-        17: ["ballys_17th.png", "ballys_17th_thumb.png"]
-    },
-    'nugget': {
-        1: ["nugget_1st.png", "nugget_1st_thumb.png"],
-        2: ["nugget_2nd.png", "nugget_2nd_thumb.png"],
-        3: ["nugget_3rd.png", "nugget_3rd_thumb.png"],
-        4: ["nugget_4th.png", "nugget_5th_thumb.png"],
-        5: ["nugget_5th.png", "nugget_5th_thumb.png"],
-        6: ["nugget_6th.png", "nugget_6th_thumb.png"],
-        7: ["nugget_7th.png", "nugget_7th_thumb.png"],
-        8: ["nugget_8th.png", "nugget_8th_thumb.png"]
-    }
+    'ballys': _floorplans('ballys', range(3, 18)),
+    'nugget': _floorplans('nugget', range(1, 9))
 }
+
+# every secret party product name which corresponds to a room
+ROOM_PRODUCTS = frozenset(product for room_data in ROOM_LIST.values() for product in room_data['rooms'])
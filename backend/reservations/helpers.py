@@ -1,14 +1,14 @@
-from csv import DictReader, DictWriter
-from datetime import datetime
+import csv
+from csv import DictWriter
+from datetime import date, datetime
+from functools import lru_cache
 import logging
 import os
 import random
 import re
 import sys
 
-import dateparser
 from django.core.mail import EmailMessage, get_connection
-from django.utils.dateparse import parse_date
 from smtplib import SMTPServerDisconnected
 import reservations.config as roombaht_config
 
@@ -18,6 +18,17 @@ logging.basicConfig(stream=sys.stdout,
 
 logger = logging.getLogger(__name__)
 
+# "Early" / "Late" markers on check in and out dates
+EARLY_LATE_RE = re.compile(r'Early|Late', re.IGNORECASE)
+# the date formats we actually see, optionally prefixed by a weekday as in "Mon - 11/7"
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+WEEKDAY_PREFIX = r'^(?:(?:' + '|'.join(WEEKDAYS) + r')[a-z]*\.?\s*-?\s*)?'
+# then either YYYY/M/D or M/D with an optional 2 or 4 digit year
+DATE_RE = re.compile(WEEKDAY_PREFIX +
+                     r'(?:(?P<iso_year>\d{4})/(?P<iso_month>\d{1,2})/(?P<iso_day>\d{1,2})'
+                     r'|(?P<month>\d{1,2})/(?P<day>\d{1,2})(?:/(?P<year>\d{2}|\d{4}))?)$',
+                     re.IGNORECASE)
+
 
 def real_date(a_date: str, year=None):
     """Convert string date into python date
@@ -37,10 +48,22 @@ def real_date(a_date: str, year=None):
     if a_date == '':
         raise ValueError("empty date string")
 
-    # Strip out strings "Early" and "Late"
-    a_date = re.sub(r'Early|Late', '', a_date, flags=re.IGNORECASE)
+    # the year is resolved before the cache so entries never outlive it
+    return _real_date(a_date, year or datetime.now().year)
 
-    year = year or datetime.now().year
+
+@lru_cache(maxsize=1024)
+def _real_date(a_date, year):
+    """Parse a non-empty date string, memoized as CSV rows repeat the same dates"""
+    # Strip out strings "Early" and "Late"
+    a_date = EARLY_LATE_RE.sub('', a_date).strip()
+    fast_date = _fast_date(a_date, year)
+    if fast_date is not None:
+        return fast_date
+
+    # dateparser is slow to import and slow per call, so only reach for it
+    # when the input isn't one of the usual formats
+    import dateparser
     dateparser_settings = {
         'RETURN_AS_TIMEZONE_AWARE': True,
         # 'PREFER_DATES_FROM': '',
@@ -66,6 +89,29 @@ def real_date(a_date: str, year=None):
     return parsed_datetime.date()
 
 
+def _fast_date(a_date, year):
+    """Parse the common date formats directly, returns None for anything else"""
+    match = DATE_RE.match(a_date)
+    if not match:
+        return None
+
+    if match['iso_year']:
+        yr, month, day = int(match['iso_year']), int(match['iso_month']), int(match['iso_day'])
+    else:
+        month, day = int(match['month']), int(match['day'])
+        if match['year']:
+            yr = int(match['year'])
+            if yr < 100:
+                yr = 2000 + yr
+        else:
+            yr = year
+
+    try:
+        return date(yr, month, day)
+    except ValueError:
+        return None
+
+
 def take3_date(date_obj):
     """Converts date string "mm-dd-yyyy" to "day - mm/dd"
 
@@ -79,50 +125,85 @@ def take3_date(date_obj):
     return formatted_date
 
 def egest_csv(items, fields, filename):
-    with open(filename, 'w') as output_handle:
+    # the csv module does its own line endings
+    with open(filename, 'w', newline='') as output_handle:
         output_dict = DictWriter(output_handle, fieldnames=fields)
         output_dict.writeheader()
-        for elem in items:
-            output_dict.writerow(elem)
+        output_dict.writerows(items)
 
 def ingest_csv(filename):
-    # turns out DictReader will accept any iterable object
-    csv_iter = None
+    # turns out csv.reader will accept any iterable object
     if isinstance(filename, str):
         if not os.path.exists(filename):
             raise Exception("input file %s not found" % filename)
-        csv_iter = open(filename, "r")
+        # newline='' leaves line endings, including those inside quoted values, to csv
+        with open(filename, "r", newline='') as csv_file:
+            return _ingest_csv_lines(csv_file)
     elif isinstance(filename, list):
-        csv_iter = filename
+        return _ingest_csv_lines(filename)
     else:
         raise Exception('must pass filename or list to ingest_csv')
 
-    input_dict = []
-    input_items = []
-    # filter out comments and blank lines
-    input_dict = DictReader(filter(lambda row: len(row) > 0 and row[0]!='#', csv_iter), skipinitialspace=True)
-    input_fields = [k.lstrip().rstrip() for k in input_dict.fieldnames if type(k)==str]
-    for elem in input_dict:
-        strip_elem = {k.lstrip().rstrip(): v.lstrip().rstrip() for k, v in elem.items() if type(k)==str and type(v)==str}
-        input_items.append(strip_elem)
+def iter_csv(filename):
+    """Yield the rows of a CSV file one at a time, rather than reading them all in"""
+    if not os.path.exists(filename):
+        raise Exception("input file %s not found" % filename)
+
+    # open here rather than in the generator, so a bad path raises on the call
+    # like ingest_csv instead of on the first row
+    return _iter_csv_file(open(filename, "r", newline=''))
+
+def _iter_csv_file(csv_file):
+    with csv_file:
+        _input_fields, input_items = _csv_rows(csv_file)
+        yield from input_items
+
+def _ingest_csv_lines(csv_iter):
+    input_fields, input_items = _csv_rows(csv_iter)
+    return input_fields, list(input_items)
+
+def _csv_rows(csv_iter):
+    # filter out comments and blank lines. a plain reader zipped against the
+    # header is a good deal quicker than DictReader, and short rows still
+    # only get the columns they have
+    reader = csv.reader((line for line in csv_iter if len(line) > 0 and line[0] != '#'), skipinitialspace=True)
+    header = next(reader, None)
+    if header is None:
+        return [], iter(())
+
+    input_fields = [k.strip() for k in header]
+    return input_fields, ({k: v.strip() for k, v in zip(input_fields, row)} for row in reader if row)
 
-    return input_fields, input_items
+WORDYLYST_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'config', 'wordylyst.md')
+
+def _load_words():
+    with open(WORDYLYST_PATH, "r") as f:
+        return tuple(word.capitalize() for word in f.read().splitlines())
+
+# read (and capitalize) the word list once rather than on every phrasing() call
+WORDS = _load_words()
 
 def phrasing():
-    words = None
-    dir_path = os.path.dirname(os.path.realpath(__file__))
-    with open("%s/../config/wordylyst.md" % dir_path , "r") as f:
-        words = f.read().splitlines()
-    word = words[random.randint(0, 999)].capitalize()+words[random.randint(0, 999)].capitalize()
-    rand = random.randint(1,3)
-    if(rand==1):
-        word = word+str(random.randint(0,99))
-    elif(rand==2):
-        word = word+str(random.randint(0,99))+words[random.randint(0,999)].capitalize()
+    # one draw from the generator, carved up into each of the choices below. 64
+    # bits is plenty for three words, a number and a shape without visible bias
+    bits = random.getrandbits(64)
+    bits, first = divmod(bits, len(WORDS))
+    bits, second = divmod(bits, len(WORDS))
+    bits, shape = divmod(bits, 3)
+    bits, number = divmod(bits, 100)
+    third = bits % len(WORDS)
+
+    word = WORDS[first] + WORDS[second]
+    if shape == 0:
+        word = word+str(number)
+    elif shape == 1:
+        word = word+str(number)+WORDS[third]
     else:
-        word = word+words[random.randint(0,999)].capitalize()
+        word = word+WORDS[third]
     return word
 
+# built from config which is fixed at startup, so only work it out once
+@lru_cache(maxsize=1)
 def my_url():
     port = roombaht_config.URL_PORT
     if port not in ("80", "443"):
@@ -141,45 +222,56 @@ def ts_suffix():
     return now.strftime('%Y-%m-%d-%H-%M')
 
 
-def send_email(addresses, subject, body, attachments=[]):
+# mail to these hosts is never really sent, see send_email
+NOOP_HOSTS = frozenset(['noop.com'])
+
+def is_noop_address(address):
+    return address.rpartition('@')[2].lower() in NOOP_HOSTS
+
+def send_email(addresses, subject, body, attachments=None, connection=None):
     """
     Send an email with optional attachments
     Can be configured to just "fake" send emails, or send emails from
     certain domains as prefixed emails to a developer.
 
+    Pass an already open mail connection when sending a lot of emails
+    so they all go out over the one SMTP session.
+
     Returns True on success (simulated or real) and False on known errors.
     """
     if not roombaht_config.SEND_MAIL:
-        logger.info("Would have sent email to %s, subject: %s", ','.join(addresses), subject)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Would have sent email to %s, subject: %s", ','.join(addresses), subject)
         return True
 
-    real_addresses = []
-    for address in addresses:
-        if '@noop.com' not in address:
-            # always send to normal emails
-            real_addresses.append(address)
-        else:
-            if roombaht_config.DEV_MAIL != '':
-                # if the ROOMBAHT_DEV_MAIL var is set then insert the address part
-                #   of the @noop.com email address as a suffix and treat as normal
-                email_address, _email_host = address.split('@')
-                dev_address, dev_host = roombaht_config.DEV_MAIL.split('@')
-                real_addresses.append(f"{dev_address}+{email_address}@{dev_host}")
-            else:
-                # otherwise just pretend to send the email
-                logger.debug("Not really sending noop dot com email to %s, subject: %s",
-                             address, subject)
-                return True
+    if roombaht_config.DEV_MAIL == '':
+        # without a dev address just pretend to send anything with a noop dot com recipient
+        noop_address = next((address for address in addresses if is_noop_address(address)), None)
+        if noop_address is not None:
+            logger.debug("Not really sending noop dot com email to %s, subject: %s",
+                         noop_address, subject)
+            return True
+
+        real_addresses = list(addresses)
+    else:
+        # if the ROOMBAHT_DEV_MAIL var is set then insert the address part
+        #   of the @noop.com email address as a suffix and treat as normal
+        dev_address, dev_host = roombaht_config.DEV_MAIL.split('@')
+        real_addresses = [f"{dev_address}+{address.partition('@')[0]}@{dev_host}" if is_noop_address(address) else address
+                          for address in addresses]
 
     msg = EmailMessage(subject=subject,
                        body=body,
                        to=real_addresses,
-                       connection = get_connection())
-
-    for attachment in attachments:
-        if os.path.exists(attachment):
-            msg.attach_file(attachment)
-        else:
+                       connection = connection or get_connection())
+
+    for attachment in attachments or []:
+        # read straight away rather than checking it exists first, same as
+        # attach_file the mimetype is guessed from the name
+        try:
+            with open(attachment, 'rb') as attachment_file:
+                msg.attach(os.path.basename(attachment), attachment_file.read())
+        except FileNotFoundError:
             logger.warning("attachment %s not found sending email to %s",
                            attachment, ','.join(addresses))
 
@@ -189,5 +281,17 @@ def send_email(addresses, subject, body, attachments=[]):
         msg.send()
         return True
     except SMTPServerDisconnected:
+        if connection is None:
+            return False
+
+    # the server dropped a shared session, e.g. it sat idle between batches.
+    # reopen it for this and the rest of the emails and try once more
+    connection.close()
+    connection.open()
+    try:
+        msg.send()
+        return True
+    except SMTPServerDisconnected:
+        connection.close()
         return False
 
@@ -1,4 +1,5 @@
 import logging
+import os
 import termios
 import tty
 import sys
@@ -13,7 +14,9 @@ def getch():
         old_settings = termios.tcgetattr(fd)
         try:
             tty.setraw(fd)
-            ch = sys.stdin.read(1)
+            # a single raw byte straight off the tty, no text decoding or
+            # buffering, only ever compared against ascii answers
+            ch = os.read(fd, 1).decode('ascii', errors='replace')
         finally:
             termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
         return ch
@@ -1,12 +1,12 @@
 import logging
-import re
+import string
 import sys
-from fuzzywuzzy import fuzz
+from rapidfuzz import fuzz
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 from pydantic import ValidationError
 import reservations.config as roombaht_config
-from reservations.helpers import ingest_csv
+from reservations.helpers import iter_csv
 from reservations.models import Room, Guest, Staff
 from reservations.ingest_models import RoomPlacementListIngest
 from reservations.management import getch, setup_logging
@@ -14,7 +14,37 @@ from reservations.management import getch, setup_logging
 logging.basicConfig(stream=sys.stdout, level=roombaht_config.LOGLEVEL)
 logger = logging.getLogger('create_rooms')
 
-def debug(msg, args):
+# --hotel-name values and the hotel name rooms are stored under
+HOTELS = {
+    'ballys': 'Ballys',
+    'nugget': 'Nugget',
+}
+
+SP_TICKET_CHARS = frozenset(string.ascii_uppercase + string.digits)
+
+# room feature text (lowercased) and the Room flag it sets
+FEATURE_FLAGS = {
+    'hearing accessible': 'is_hearing_accessible',
+    'ada': 'is_ada',
+    'lakeview': 'is_lakeview',
+    'lake view': 'is_lakeview',
+    'mountainview': 'is_mountainview',
+    'mountain view': 'is_mountainview',
+}
+
+# the columns an import reads or writes. anything else is deferred, and as
+# loading a deferred column costs a query per object it must stay untouched
+ROOM_FIELDS = ('id', 'number', 'name_take3', 'name_hotel', 'is_available', 'is_swappable',
+               'is_lakeview', 'is_mountainview', 'is_ada', 'is_hearing_accessible', 'is_special',
+               'is_placed', 'swap_code', '_check_in', '_check_out', 'sp_ticket_id', 'primary',
+               'secondary', 'placed_by_roombot', 'guest')
+GUEST_FIELDS = ('id', 'name', 'email', 'ticket', 'transfer', 'room_number', 'hotel', 'last_login')
+
+def valid_sp_ticket(ticket):
+    """SecretParty ticket ids are six upper case letters or digits"""
+    return len(ticket) == 6 and SP_TICKET_CHARS.issuperset(ticket)
+
+def debug(cmd, msg, args):
     if args.get('verbosity', 1) >= 2:
         cmd.stdout.write(msg)
 
@@ -37,33 +67,91 @@ def room_changes(room):
 
     return msg
 
+def dirty_field_names(objs):
+    names = set()
+    for obj in objs:
+        names.update(obj.get_dirty_fields(check_relationship=True).keys())
+
+    return list(names)
+
+def remember(edits, obj):
+    """Note how obj looked before the current row touched it, so the row can be undone"""
+    if obj is not None and id(obj) not in edits:
+        edits[id(obj)] = (obj, dict(obj.__dict__), dict(obj._state.fields_cache))
+
+def row_changed(edits, obj):
+    """
+    Whether the current row changed obj since remember() saw it. Writes wait for
+    the end of the run, so is_dirty() would also count changes from earlier rows
+    """
+    _obj, attrs, _fields_cache = edits[id(obj)]
+    missing = object()
+    return any(attrs.get(field.attname, missing) != obj.__dict__.get(field.attname, missing)
+               for field in obj._meta.concrete_fields)
+
+def undo(edits):
+    """Put back every room and guest a skipped or declined row changed"""
+    for obj, attrs, fields_cache in edits.values():
+        obj.__dict__.update(attrs)
+        obj._state.fields_cache = fields_cache
+
+    edits.clear()
+
+def save_changes(rooms, guests):
+    """Write out every accepted room and guest change in one transaction"""
+    if not rooms and not guests:
+        return
+
+    new_rooms = [x for x in rooms.values() if x._state.adding]
+    changed_rooms = [x for x in rooms.values() if not x._state.adding]
+    batch_size = roombaht_config.BULK_BATCH_SIZE
+    try:
+        with transaction.atomic():
+            if guests:
+                Guest.objects.bulk_update(guests.values(), dirty_field_names(guests.values()),
+                                          batch_size=batch_size)
+
+            changed_fields = dirty_field_names(changed_rooms)
+            if changed_fields:
+                Room.objects.bulk_update(changed_rooms, changed_fields, batch_size=batch_size)
+
+            Room.objects.bulk_create(new_rooms, batch_size=batch_size)
+    except Exception as e:
+        raise CommandError(f"Failed to save changes, nothing was updated: {e}")
+
+    rooms.clear()
+    guests.clear()
+
 def create_rooms_main(cmd, args):
     rooms_file = args['rooms_file']
-    hotel = None
-    if args['hotel_name'].lower() == 'ballys':
-        hotel = "Ballys"
-    elif args['hotel_name'].lower() == 'nugget':
-        hotel = 'Nugget'
-    else:
-        raise Exception(f"Unknown hotel name {args['hotel_name']} specified")
+    try:
+        hotel = HOTELS[args['hotel_name'].lower()]
+    except KeyError as exp:
+        raise CommandError(f"Unknown hotel name {args['hotel_name']} specified") from exp
 
     rooms = {}
-    _rooms_fields, rooms_rows = ingest_csv(rooms_file)
     rooms_import_list = []
     dupe_rooms = []
     dupe_tickets = []
-    sp_ticket_pattern = re.compile(r'^[A-Z0-9]{6}$')
-    for r in rooms_rows:
+    # rooms and tickets seen so far, so spotting duplicates doesn't mean
+    # rescanning every previous row
+    seen_rooms = set()
+    seen_tickets = set()
+    # rows are validated as they are read, only the parsed rows are kept
+    for r in iter_csv(rooms_file):
         try:
             room_data = RoomPlacementListIngest(**r)
-            if len([x for x in rooms_import_list if x.room == room_data.room]) > 0:
+            if room_data.room in seen_rooms:
                 dupe_rooms.append(str(room_data.room))
 
-            if room_data.ticket_id_in_secret_party and \
-               len([x for x in rooms_import_list if x.ticket_id_in_secret_party == room_data.ticket_id_in_secret_party]) > 0:
-                dupe_tickets.append(room_data.ticket_id_in_secret_party)
+            if room_data.ticket_id_in_secret_party:
+                if room_data.ticket_id_in_secret_party in seen_tickets:
+                    dupe_tickets.append(room_data.ticket_id_in_secret_party)
+
+                seen_tickets.add(room_data.ticket_id_in_secret_party)
 
             rooms_import_list.append(room_data)
+            seen_rooms.add(room_data.room)
         except ValidationError as e:
             cmd.stdout.write(cmd.style.ERROR(f"Validation error for row {e}"))
 
@@ -73,19 +161,50 @@ def create_rooms_main(cmd, args):
     if len(dupe_tickets) > 0:
         raise Exception(f"Duplicate ticket id(s) {','.join(dupe_tickets)} in CSV, refusing to process file")
 
-    debug(f"read in {len(rooms_rows)} rooms for {hotel}", args)
-
-    processed_rooms = []
+    debug(cmd, f"read in {len(rooms_import_list)} rooms for {hotel}", args)
+
+    # every room already in this hotel, with its guest, in one query rather
+    # than one per row. room numbers are stored as strings.
+    existing_rooms = {x.number: x for x in Room.objects.filter(name_hotel=hotel)
+                      .select_related('guest')
+                      .only(*ROOM_FIELDS, *(f"guest__{x}" for x in GUEST_FIELDS))}
+
+    # guests for every ticket in the file, starting from the ones already
+    # loaded with their rooms so each guest is only ever one instance
+    guests_by_ticket = {x.guest.ticket: x.guest for x in existing_rooms.values() if x.guest}
+    missing_tickets = {x.ticket_id_in_secret_party for x in rooms_import_list
+                       if x.ticket_id_in_secret_party} - guests_by_ticket.keys()
+    if missing_tickets:
+        guests_by_ticket.update({x.ticket: x for x in
+                                 Guest.objects.filter(ticket__in=missing_tickets).only(*GUEST_FIELDS)})
+
+    # rooms those guests currently hold in other hotels, for cleaning up after a move.
+    # rooms in this hotel are already loaded above
+    other_room_keys = {(x.room_number, x.hotel) for x in guests_by_ticket.values()
+                       if x.room_number and x.hotel and x.hotel != hotel}
+    other_rooms = {}
+    if other_room_keys:
+        other_rooms = {(x.number, x.name_hotel): x for x in
+                       Room.objects.filter(number__in={x[0] for x in other_room_keys},
+                                           name_hotel__in={x[1] for x in other_room_keys})
+                       .only(*ROOM_FIELDS)}
+
+    # accepted changes, keyed by id() as unsaved rooms are not hashable, and
+    # written in bulk once every row has been through. rows edit the shared
+    # room and guest instances above, so whatever a row touches is remembered
+    # in row_edits and undone unless the row ends up pending
+    pending_rooms = {}
+    pending_guests = {}
+    processed_rooms = set()
     for elem in rooms_import_list:
         if len(args['only_room']) > 0 and str(elem.room) not in args['only_room']:
             continue
 
-        room = None
-        room_update = False
-        try:
-            room = Room.objects.get(number=elem.room, name_hotel=hotel)
-            room_update = True
-        except Room.DoesNotExist:
+        row_edits = {}
+        room = existing_rooms.get(str(elem.room))
+        room_update = room is not None
+        remember(row_edits, room)
+        if not room_update:
             # some things are not mutable
             # * room features
             # * room number
@@ -98,21 +217,12 @@ def create_rooms_main(cmd, args):
 
             room = Room(name_take3=room_name,
                         name_hotel=hotel,
-                        number=elem.room)
-
-            try:
-                features = elem.room_features.lower()
-            except KeyError:
-                features = []
-
-            if 'hearing accessible' in features:
-                room.is_hearing_accessible = True
-            if 'ada' in features:
-                room.is_ada = True
-            if 'lakeview' in features or 'lake view' in features:
-                room.is_lakeview = True
-            if 'mountainview' in features or 'mountain view' in features:
-                room.is_mountainview = True
+                        number=str(elem.room))
+
+            features = (elem.room_features or '').lower()
+            for feature, flag in FEATURE_FLAGS.items():
+                if feature in features:
+                    setattr(room, flag, True)
 
         # todo `placed_by_roombaht` should be parsed as a bool!
         if elem.placed_by_roombaht.lower() == 'true' and not room.placed_by_roombot:
@@ -147,7 +257,8 @@ def create_rooms_main(cmd, args):
                 room.is_swappable = False
             else:
                 if elem.ticket_id_in_secret_party == '':
-                    debug(f"Room {room.number}, placed by roombot, being skipped, as it is marked as available in airtable", args)
+                    debug(cmd, f"Room {room.number}, placed by roombot, being skipped, as it is marked as available in airtable", args)
+                    undo(row_edits)
                     continue
 
                 cmd.stdout.write(cmd.style.WARNING(f"Room {room.number}, placed by roombot, showing as having ticket in airtable"))
@@ -157,6 +268,8 @@ def create_rooms_main(cmd, args):
         #       drama we lose the fact that some folk have mixed capitalization names i.e.
         #       Name McName and I guess we need to figure out how to handle that
         primary_name = None
+        # guests the current guest's ticket was transferred through, walked at most once per row
+        guest_chain = None
         if elem.first_name_resident != '':
             primary_name = elem.first_name_resident
             if elem.last_name_resident == '':
@@ -164,32 +277,35 @@ def create_rooms_main(cmd, args):
             else:
                 primary_name = f"{primary_name} {elem.last_name_resident}"
 
-            if room.primary != primary_name.title():
-                fuzziness = fuzz.ratio(room.primary, primary_name)
+            primary_title = primary_name.title()
+            if room.primary != primary_title:
+                fuzziness = round(fuzz.ratio(room.primary, primary_name))
                 if room.guest and room.guest.transfer:
-                    trans_guest = room.guest.chain(room.guest.transfer)[-1]
+                    guest_chain = room.guest.chain(room.guest.transfer)
+                    trans_guest = guest_chain[-1]
                     if elem.ticket_id_in_secret_party == room.guest.ticket:
-                        guest_fuzziness = fuzz.ratio(room.guest.name, primary_name.title())
+                        guest_fuzziness = round(fuzz.ratio(room.guest.name, primary_title))
                         if guest_fuzziness >= args['fuzziness']:
-                            debug(cmd.style.SUCCESS(f"Updating primary name for {room.number} transfer {room.guest.transfer}"
-                                                    f" {room.primary} -> {primary_name}, as it matches associated guest name"
-                                                    f" (fuzziness{fuzziness} outside threshold of {args['fuzziness']}"), args)
-                            room.primary = primary_name.title()
+                            debug(cmd, cmd.style.SUCCESS(f"Updating primary name for {room.number} transfer {room.guest.transfer}"
+                                                         f" {room.primary} -> {primary_name}, as it matches associated guest name"
+                                                         f" (fuzziness{fuzziness} outside threshold of {args['fuzziness']}"), args)
+                            room.primary = primary_title
 
-                    elif trans_guest.name == primary_name.title():
+                    elif trans_guest.name == primary_title:
                         cmd.stdout.write(cmd.style.WARNING(
                             f"Room {room.number} ignoring airtable due to transfer {room.guest.transfer}"))
+                        undo(row_edits)
                         continue
                     else:
                         if fuzziness < args['fuzziness']:
-                            room.primary = primary_name.title()
+                            room.primary = primary_title
                         else:
-                            debug(cmd.style.SUCCESS(f"Room {room.number} updating primary name"
-                                                    f" {room.primary}->{primary_name} ({fuzziness}"
-                                                    f" fuzziness within threshold of {args['fuzziness']}"), args)
+                            debug(cmd, cmd.style.SUCCESS(f"Room {room.number} updating primary name"
+                                                         f" {room.primary}->{primary_name} ({fuzziness}"
+                                                         f" fuzziness within threshold of {args['fuzziness']}"), args)
                 else:
                     if fuzziness < args['fuzziness']:
-                        room.primary = primary_name.title()
+                        room.primary = primary_title
                     else:
                         cmd.stdout.write(cmd.style.SUCCESS(f"Not updating primary name for {room.number}"
                                                            f" {room.primary}->{primary_name} ({fuzziness}"
@@ -215,8 +331,9 @@ def create_rooms_main(cmd, args):
 
         # Validate sp_ticket_id format if present
         if elem.ticket_id_in_secret_party and \
-           not bool(sp_ticket_pattern.fullmatch(elem.ticket_id_in_secret_party)):
+           not valid_sp_ticket(elem.ticket_id_in_secret_party):
             cmd.stdout.write(cmd.style.ERROR(f"Skipping room {room.number} with invalid sp_ticket_id in airtable {elem.ticket_id_in_secret_party}"))
+            undo(row_edits)
             continue
 
         # Always reconcile Room <-> Guest relationships when preserve mode is active
@@ -244,16 +361,23 @@ def create_rooms_main(cmd, args):
                     a_key = getch()
                     if a_key == 'q':
                         cmd.stdout.write(cmd.style.ERROR("Giving up on update process"))
+                        undo(row_edits)
+                        save_changes(pending_rooms, pending_guests)
                         sys.exit(1)
                     elif a_key != 'y':
+                        undo(row_edits)
                         continue
 
-                if room.guest \
-                   and room.guest.transfer \
-                   and elem.ticket_id_in_secret_party in [x.ticket for x in room.guest.chain(room.guest.transfer)]:
-                    cmd.stdout.write(cmd.style.WARNING(f"Room {room.number} not being reconciled due to transfer {room.guest.transfer}"))
-                    continue
+                if room.guest.transfer:
+                    if guest_chain is None:
+                        guest_chain = room.guest.chain(room.guest.transfer)
+
+                    if any(x.ticket == elem.ticket_id_in_secret_party for x in guest_chain):
+                        cmd.stdout.write(cmd.style.WARNING(f"Room {room.number} not being reconciled due to transfer {room.guest.transfer}"))
+                        undo(row_edits)
+                        continue
 
+                remember(row_edits, room.guest)
                 room.guest.room_number = None
                 room.guest.hotel = None
                 old_guest = room.guest
@@ -265,20 +389,32 @@ def create_rooms_main(cmd, args):
 
             # Associate guest with ticket to this room
             if elem.ticket_id_in_secret_party:
-                try:
-                    new_guest = Guest.objects.get(ticket=elem.ticket_id_in_secret_party)
-
-
+                new_guest = guests_by_ticket.get(elem.ticket_id_in_secret_party)
+                if new_guest is None:
+                    # No guest found with this ticket - clear room guest
+                    if ticket_changed:
+                        room.guest = None
+                    else:
+                        cmd.stdout.write(cmd.style.WARNING(
+                            f"Room {room.number} has sp_ticket_id {elem.ticket_id_in_secret_party} "
+                            f"but no matching Guest found in database"))
+                else:
                     # Clean up guest's old room if they had one
                     if new_guest.room_number and new_guest.hotel:
-                        try:
-                            old_room = Room.objects.get(number=new_guest.room_number, name_hotel=new_guest.hotel)
+                        if new_guest.hotel == hotel:
+                            old_room = existing_rooms.get(new_guest.room_number)
+                        else:
+                            old_room = other_rooms.get((new_guest.room_number, new_guest.hotel))
+
+                        # Guest had room info but room doesn't exist - will be cleaned up
+                        if old_room is not None:
                             if old_room.number != room.number:
                                 if old_room.number in processed_rooms:
                                     cmd.stdout.write(cmd.style.WARNING(
                                         f"Not able to update {new_guest.name}'s old room {old_room.number}. "
                                         f"Please run system checks to identify potential side effects"))
                                 else:
+                                    remember(row_edits, old_room)
                                     old_room.guest = None
                                     old_room.primary = ""
                                     old_room.secondary = ""
@@ -289,24 +425,13 @@ def create_rooms_main(cmd, args):
                                     old_room.is_swappable = True
                                     old_room.is_placed = False
                                     old_room.sp_ticket_id = None
-                        except Room.DoesNotExist:
-                            # Guest had room info but room doesn't exist - will be cleaned up
-                            pass
 
                     # Associate guest with this room
+                    remember(row_edits, new_guest)
                     new_guest.room_number = room.number
                     new_guest.hotel = room.name_hotel
                     room.guest = new_guest
 
-                except Guest.DoesNotExist:
-                    # No guest found with this ticket - clear room guest
-                    if ticket_changed:
-                        room.guest = None
-                    else:
-                        cmd.stdout.write(cmd.style.WARNING(
-                            f"Room {room.number} has sp_ticket_id {elem.ticket_id_in_secret_party} "
-                            f"but no matching Guest found in database"))
-
             # Clear room if ticket is now empty
             elif ticket_changed and not elem.ticket_id_in_secret_party:
                 room.guest = None
@@ -319,29 +444,39 @@ def create_rooms_main(cmd, args):
                 room.is_swappable = True
                 room.is_placed = False
 
-        # loaded room, check if room (and associated guest records) changed
-        if room.is_dirty(check_relationship=True):
+        # loaded room, check if this row changed the room (and associated guest records).
+        # the dirty fields, which include earlier accepted rows, are still what is shown and saved
+        if room_update:
+            changed = row_changed(row_edits, room)
+        else:
+            changed = room.is_dirty(check_relationship=True)
+
+        if changed:
+            # each of these walks every tracked field, so only ask once per row
+            old_guest_dirty = old_guest is not None and old_guest.is_dirty()
+            new_guest_dirty = room.guest is not None and room.guest.is_dirty()
+            old_room_dirty = old_room is not None and old_room.is_dirty(check_relationship=True)
             if args['dry_run']:
-                if old_guest and old_guest.is_dirty():
+                if old_guest_dirty:
                     cmd.stdout.write(cmd.style.MIGRATE_LABEL(f"Old Guest\n{guest_changes(old_guest)}\n"))
 
-                if room.guest and room.guest.is_dirty():
+                if new_guest_dirty:
                     cmd.stdout.write(cmd.style.MIGRATE_LABEL(f"New Guest\n{guest_changes(room.guest)}\n"))
 
-                if old_room and old_room.is_dirty(check_relationship=True):
-                    cmd.stdout.write(cmd.style.MIGRATE_LABEL(f"Old Room\n{room_changes(room)}\n"))
+                if old_room_dirty:
+                    cmd.stdout.write(cmd.style.MIGRATE_LABEL(f"Old Room\n{room_changes(old_room)}\n"))
 
                 cmd.stdout.write(cmd.style.MIGRATE_LABEL(room_changes(room)))
             else:
                 if room_update and not args['force']:
                     msg = "Proposed Changes\n"
-                    if old_guest and old_guest.is_dirty():
+                    if old_guest_dirty:
                         msg += f"Old Guest\n{guest_changes(old_guest)}\n"
 
-                    if room.guest and room.guest.is_dirty():
+                    if new_guest_dirty:
                         msg += f"New Guest\n{guest_changes(room.guest)}\n"
 
-                    if old_room and old_room.is_dirty(check_relationship=True):
+                    if old_room_dirty:
                         msg += f"Old Room\n{room_changes(old_room)}\n"
 
                     msg += f"{room_changes(room)} [y/n/q (to stop process)]"
@@ -349,8 +484,12 @@ def create_rooms_main(cmd, args):
                     a_key = getch()
                     if a_key == 'q':
                         cmd.stdout.write(cmd.style.ERROR("Giving up on update process"))
+                        undo(row_edits)
+                        save_changes(pending_rooms, pending_guests)
                         sys.exit(1)
                     elif a_key != 'y':
+                        # back to how earlier rows left it, which may itself be pending
+                        undo(row_edits)
                         cmd.stdout.write(cmd.style.WARNING(f"Room {room.number} not being updated"))
                         continue
 
@@ -371,26 +510,19 @@ def create_rooms_main(cmd, args):
                     if room.is_special:
                         room_msg += ", special!"
 
-                # Wrap all related database writes for this room in a single transaction
-                # so either all related changes commit or none do.
-                try:
-                    with transaction.atomic():
-                        if old_guest and old_guest.is_dirty():
-                            old_guest.save_dirty_fields()
-
-                        if old_room and old_room.is_dirty(check_relationship=True):
-                            old_room.save_dirty_fields()
+                if old_guest_dirty:
+                    pending_guests[id(old_guest)] = old_guest
 
-                        if room.guest and room.guest.is_dirty():
-                            room.guest.save_dirty_fields()
+                if old_room_dirty:
+                    pending_rooms[id(old_room)] = old_room
 
-                        room.save_dirty_fields()
-                except Exception as e:
-                    # Surface the error to the user and skip further processing of this room
-                    cmd.stdout.write(cmd.style.ERROR(f"Failed to save changes for room {room.number}: {e}"))
-                    continue
+                if new_guest_dirty:
+                    pending_guests[id(room.guest)] = room.guest
 
+                pending_rooms[id(room)] = room
+                row_edits.clear()
                 cmd.stdout.write(cmd.style.SUCCESS(room_msg))
+                existing_rooms[str(elem.room)] = room
 
             # build up some ingestion metrics
             room_count_obj = None
@@ -412,11 +544,15 @@ def create_rooms_main(cmd, args):
 
             rooms[room.name_take3] = room_count_obj
 
-            processed_rooms.append(room.number)
+            processed_rooms.add(room.number)
 
         else:
-            debug(f"No changes to room {room.number}", args)
+            debug(cmd, f"No changes to room {room.number}", args)
 
+        # dry runs, and rows with nothing to save, leave the next row the state as loaded
+        undo(row_edits)
+
+    save_changes(pending_rooms, pending_guests)
 
     total_rooms = 0
     available_rooms = 0
@@ -486,9 +622,7 @@ class Command(BaseCommand):
             raise CommandError('can only specify --dry-run with --preserve')
 
         if not kwargs['preserve']:
-            if len(Room.objects.all()) > 0 or \
-               len(Staff.objects.all()) > 0 or \
-               len(Guest.objects.all()) > 0:
+            if Room.objects.exists() or Staff.objects.exists() or Guest.objects.exists():
                 if not kwargs['force']:
                     print('Wipe data? [y/n]')
                     if getch().lower() != 'y':
@@ -496,15 +630,19 @@ class Command(BaseCommand):
                 else:
                     logger.info('Wiping all data at user request!')
 
-            # Wrap deletes in a transaction to ensure the wipe is atomic.
-            try:
-                with transaction.atomic():
+            # The wipe and the load share one transaction, so a load that fails
+            # part way leaves the previous data in place rather than nothing.
+            # There is nothing left to prompt about once everything is wiped.
+            with transaction.atomic():
+                try:
                     Room.objects.all().delete()
                     Guest.objects.all().delete()
-            except Exception as e:
-                raise CommandError(f"Failed to wipe existing data: {e}")
+                except Exception as e:
+                    raise CommandError(f"Failed to wipe existing data: {e}")
+
+                create_rooms_main(self, kwargs)
         else:
             if kwargs['dry_run']:
                 self.stdout.write('Dry run for update (no changes will be made)')
 
-        create_rooms_main(self, kwargs)
+            create_rooms_main(self, kwargs)
@@ -3,7 +3,7 @@ from django.db import transaction
 import logging
 
 from reservations.config import SP_API_KEY
-from reservations.secret_party import SecretPartyClient, SecretPartyAPIError, SecretPartyAuthError
+from reservations.secret_party import SecretPartyAPIError, SecretPartyAuthError
 from reservations.services.guest_ingestion_service import GuestIngestionService
 from reservations.ingest_models import SecretPartyGuestIngest
 
@@ -49,50 +49,43 @@ class Command(BaseCommand):
                 "Secret Party API key not found. Please set ROOMBAHT_SP_API_KEY environment variable."
             )
 
-    def fetch_tickets(self, client, options):
+    def fetch_tickets(self, ingestion_service, options):
         """
         Fetch tickets from Secret Party API based on command options.
 
         Args:
-            client: SecretPartyClient instance
+            ingestion_service: GuestIngestionService instance
             options: Command options dictionary
 
         Returns:
             List of ticket dictionaries
         """
         try:
-            # Fetch all active and transferred tickets (default)
-            self.stdout.write("Fetching all active and transferred tickets...")
-            tickets = client.get_all_active_and_transferred_tickets(
-                order=options.get('order'),
-                reverse=options.get('reverse'),
-                force=options.get('no_cache', False)
-            )
-
-            return tickets
+            # the same export the ingest works from, so a dry run previews what would be processed
+            self.stdout.write("Fetching add-on tickets...")
+            return ingestion_service.fetch_secretparty_tickets(force=options.get('no_cache', False))
 
         except SecretPartyAuthError as e:
             raise CommandError(f"Secret Party authentication failed: {e}")
         except SecretPartyAPIError as e:
             raise CommandError(f"Secret Party API error: {e}")
 
-    def process_tickets(self, tickets, dry_run=False):
+    def process_tickets(self, ingestion_service, tickets, dry_run=False):
         if dry_run:
             self.stdout.write(self.style.WARNING("DRY RUN - No changes will be made"))
             self.stdout.write("Would process tickets from Secret Party API...")
             if tickets:
                 self.stdout.write(f"Sample tickets (showing first 3 of {len(tickets)}):")
-                for i, ticket in enumerate(tickets[:3]):
+                # tickets are returned ordered by date desc, show the oldest first
+                for i, ticket in enumerate(tickets[:-4:-1]):
                     self.stdout.write(f"  {i+1}. {ticket.get('first_name', '')} {ticket.get('last_name', '')} ({ticket.get('email', '')})")
                 if len(tickets) > 3:
                     self.stdout.write(f"  ... and {len(tickets) - 3} more")
             return {"dry_run": True, "ticket_count": len(tickets) if tickets else 0}
 
-        # Process through ingestion service
+        # Process through ingestion service, handing over the tickets already fetched
         try:
-            ingestion_service = GuestIngestionService()
-
-            results = ingestion_service.ingest_from_external_source('secretparty')
+            results = ingestion_service.ingest_from_external_source('secretparty', {'tickets': tickets})
             return results
         except Exception as e:
             raise CommandError(f"Guest processing failed: {e}")
@@ -108,15 +101,14 @@ class Command(BaseCommand):
 
         self.stdout.write("Starting Secret Party guest ingestion...")
 
+        # tickets are fetched once, and either previewed or processed
+        ingestion_service = GuestIngestionService()
+        tickets = self.fetch_tickets(ingestion_service, options)
+
         # Process tickets
         if options['dry_run']:
-            # For dry run, we still need to fetch tickets to show what would be processed
             try:
-                client = SecretPartyClient(SP_API_KEY)
-                # tickets are returned orderd by date desc
-                tickets = self.fetch_tickets(client, options)
-                tickets.reverse()
-                results = self.process_tickets(tickets, dry_run=True)
+                results = self.process_tickets(ingestion_service, tickets, dry_run=True)
                 self.stdout.write(
                     self.style.SUCCESS(f"Dry run complete. Would process {results.get('ticket_count', 0)} tickets.")
                 )
@@ -126,7 +118,7 @@ class Command(BaseCommand):
             # Use database transaction for safety
             try:
                 with transaction.atomic():
-                    results = self.process_tickets(None, dry_run=False)
+                    results = self.process_tickets(ingestion_service, tickets, dry_run=False)
 
                     # Report results
                     if results.get('success', False):
@@ -1,10 +1,59 @@
+from contextlib import contextmanager
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
 from reservations.models import Room, Guest
 from reservations.management import getch, setup_logging
 import reservations.config as roombaht_config
 import logging
 
+# tickets reachable from a starting ticket, following transfers towards the head
+# (upstream) and the tail (downstream). UNION rather than UNION ALL, so a chain
+# which loops back on itself still terminates
+CHAIN_TICKETS_SQL = """
+WITH RECURSIVE upstream(ticket, transfer) AS (
+    SELECT ticket, transfer FROM {table} WHERE ticket = %s
+    UNION
+    SELECT g.ticket, g.transfer FROM {table} g
+    JOIN upstream u ON g.ticket = u.transfer AND u.transfer <> ''
+),
+downstream(ticket) AS (
+    SELECT ticket FROM {table} WHERE ticket = %s
+    UNION
+    SELECT g.ticket FROM {table} g JOIN downstream d ON g.transfer = d.ticket
+)
+SELECT ticket FROM upstream UNION SELECT ticket FROM downstream
+"""
+
+# columns read or written while fixing a chain, everything else stays deferred
+GUEST_CHAIN_FIELDS = ('id', 'ticket', 'transfer', 'email', 'name', 'room_number', 'hotel', 'can_login')
+ROOM_CHAIN_FIELDS = ('id', 'number', 'name_hotel', 'guest', 'sp_ticket_id', 'primary', 'secondary',
+                     'is_available', 'is_placed', 'guest__id', 'guest__email')
+
+
+@contextmanager
+def chain_snapshot():
+    """
+    Read or fix a chain inside one short transaction. On PostgreSQL this is
+    REPEATABLE READ, so every query sees the same snapshot and a chain being
+    transferred concurrently can't be read half-updated. Never hold one open
+    across an operator prompt. Nested inside an existing transaction it's just a
+    savepoint, as the isolation level can no longer be changed.
+    """
+    outermost = not connection.in_atomic_block
+    with transaction.atomic():
+        if outermost and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        yield
+
+
+def change_summary(changes):
+    """What a list of changes would do, comparable between two reads of a chain"""
+    return [(change[0], change[1].pk, change[2]) if change[0] in ('guest', 'room') else (change[0],)
+            for change in changes]
+
 
 class TransferChainFixer:
     """Encapsulates logic for identifying and fixing transfer chain issues."""
@@ -22,61 +71,71 @@ class TransferChainFixer:
 
         Raises CommandError if head or tail cannot be determined.
         """
+        # Load every guest linked to this ticket, in either direction, up front
+        by_ticket = {}
+        by_transfer = {}
+        for guest in self.chain_guests(ticket_id):
+            by_ticket.setdefault(guest.ticket, []).append(guest)
+            if guest.transfer:
+                by_transfer.setdefault(guest.transfer, []).append(guest)
+
         # Find the starting guest with this ticket
-        try:
-            start_guest = Guest.objects.get(ticket=ticket_id)
-        except Guest.DoesNotExist:
+        start_guests = by_ticket.get(ticket_id, [])
+        if len(start_guests) == 0:
             raise CommandError(f"No guest found with ticket {ticket_id}")
-        except Guest.MultipleObjectsReturned:
+        if len(start_guests) > 1:
             raise CommandError(f"Multiple guests found with ticket {ticket_id} - database corruption")
 
+        start_guest = start_guests[0]
+
         # Walk BACKWARD (upstream) to find head
         # Head has Guest.transfer that is empty/None
         # Head's Guest.ticket appears in a downstream Guest.transfer
         current = start_guest
         upstream_chain = [current]
+        # A transfer pointing back into the chain would otherwise walk forever
+        visited = {current.ticket}
 
         while current.transfer and current.transfer != '':
             # Find the guest whose ticket matches current's transfer
-            try:
-                upstream_guest = Guest.objects.get(ticket=current.transfer)
-                upstream_chain.insert(0, upstream_guest)
-                current = upstream_guest
-            except Guest.DoesNotExist:
+            upstream_guests = by_ticket.get(current.transfer, [])
+            if len(upstream_guests) == 0:
                 raise CommandError(f"Broken chain: ticket {current.transfer} not found (referenced by {current.ticket})")
-            except Guest.MultipleObjectsReturned:
+            if len(upstream_guests) > 1:
                 raise CommandError(f"Multiple guests found with ticket {current.transfer} - database corruption")
 
-        head = upstream_chain[0]
+            current = upstream_guests[0]
+            if current.ticket in visited:
+                raise CommandError(f"Cycle detected at ticket {current.ticket} - database corruption")
+            visited.add(current.ticket)
+            upstream_chain.insert(0, current)
 
-        # Verify head has no transfer (or empty transfer)
-        if head.transfer and head.transfer != '':
-            raise CommandError(f"Cannot find head: guest {head.email} (ticket {head.ticket}) still has transfer={head.transfer}")
+        head = upstream_chain[0]
 
         # Walk FORWARD (downstream) from the starting guest to find tail
         # Tail's Guest.ticket does NOT appear in any other Guest.transfer
         # Each intermediate's Guest.ticket should be in a downstream Guest.transfer
         current = start_guest
         downstream_chain = []
+        visited = set()
 
         while True:
+            if current.ticket in visited:
+                raise CommandError(f"Cycle detected at ticket {current.ticket} - database corruption")
+            visited.add(current.ticket)
             downstream_chain.append(current)
 
             # Find guest who has this ticket in their transfer field
-            try:
-                downstream_guest = Guest.objects.get(transfer=current.ticket)
-                current = downstream_guest
-            except Guest.DoesNotExist:
+            downstream_guests = by_transfer.get(current.ticket, [])
+            if len(downstream_guests) == 0:
                 # No one has this ticket in their transfer - this is the tail
                 break
-            except Guest.MultipleObjectsReturned:
+            if len(downstream_guests) > 1:
                 raise CommandError(f"Multiple guests have transfer={current.ticket} - database corruption")
 
-        tail = current
+            current = downstream_guests[0]
 
-        # Verify tail: no other guest should have tail's ticket in their transfer field
-        if Guest.objects.filter(transfer=tail.ticket).exists():
-            raise CommandError(f"Cannot find tail: guest {tail.email} (ticket {tail.ticket}) was transferred to someone else")
+        tail = current
 
         # Build complete chain by combining upstream (before start) and downstream (after start)
         # Remove duplicates where they overlap (the start_guest)
@@ -87,21 +146,19 @@ class TransferChainFixer:
 
         return full_chain, head, tail
 
-    def find_tail(self, chain):
+    def chain_guests(self, ticket_id):
         """
-        Identify the tail guest in a chain (current owner).
-        The tail is the guest whose ticket does NOT appear in any other guest's transfer field.
+        Every guest on the transfer chain through a ticket, fetched with one recursive
+        query for the linked tickets and one for the guests holding them, rather than a
+        query per hop. Guests sharing a linked ticket are all returned so corruption
+        can still be reported.
         """
-        # Get all tickets that have been transferred away
-        transferred_tickets = set(Guest.objects.exclude(transfer='').exclude(transfer__isnull=True).values_list('transfer', flat=True))
+        table = Guest._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(CHAIN_TICKETS_SQL.format(table=table), [ticket_id, ticket_id])
+            tickets = [row[0] for row in cursor.fetchall()]
 
-        # Find guest in chain whose ticket is not in transferred_tickets
-        for guest in reversed(chain):
-            if guest.ticket not in transferred_tickets:
-                return guest
-
-        # If all tickets were transferred (shouldn't happen), return last guest
-        return chain[-1] if chain else None
+        return list(Guest.objects.filter(ticket__in=tickets).only(*GUEST_CHAIN_FIELDS).order_by('id'))
 
     def get_changes(self, chain, tail, orphan_action='ask', chosen_room=None):
         """
@@ -121,8 +178,23 @@ class TransferChainFixer:
         # 2. Guest.room_number/hotel fields (which might not have Room objects)
 
         all_chain_rooms = []  # List of (room, guest_index_in_chain) tuples
+        seen_room_ids = set()  # pks of the rooms already in all_chain_rooms
         room_locations = {}  # Track (hotel, room_number) -> {'rooms': [(room, idx)], 'guest_fields': [(guest, idx)]}
 
+        # Every room pointing at the chain, by FK or by ticket, in one query rather than two per guest
+        fk_rooms = {}
+        ticket_rooms = {}
+        chain_rooms = Room.objects.filter(Q(guest__in=[g.id for g in chain]) |
+                                          Q(sp_ticket_id__in=[g.ticket for g in chain])) \
+                                  .select_related('guest') \
+                                  .only(*ROOM_CHAIN_FIELDS) \
+                                  .order_by('id')
+        for room in chain_rooms:
+            if room.guest_id:
+                fk_rooms.setdefault(room.guest_id, []).append(room)
+            if room.sp_ticket_id:
+                ticket_rooms.setdefault(room.sp_ticket_id, []).append(room)
+
         for idx, guest in enumerate(chain):
             # Track Guest.room_number/hotel fields (original assignment indicator)
             if guest.room_number and guest.hotel:
@@ -131,28 +203,18 @@ class TransferChainFixer:
                     room_locations[loc] = {'rooms': [], 'guest_fields': []}
                 room_locations[loc]['guest_fields'].append((guest, idx))
 
-            # Collect rooms via FK relationship
-            for room in guest.room_set.all():
-                room_tuple = (room, idx)
-                if room not in [r[0] for r in all_chain_rooms]:
-                    all_chain_rooms.append(room_tuple)
-                    loc = (room.name_hotel, room.number)
-                    if loc not in room_locations:
-                        room_locations[loc] = {'rooms': [], 'guest_fields': []}
-                    room_locations[loc]['rooms'].append((room, idx))
-
-            # Find rooms by sp_ticket_id
-            rooms_by_ticket = Room.objects.filter(sp_ticket_id=guest.ticket)
-            for room in rooms_by_ticket:
-                room_tuple = (room, idx)
-                if room not in [r[0] for r in all_chain_rooms]:
-                    all_chain_rooms.append(room_tuple)
-                    loc = (room.name_hotel, room.number)
-                    if loc not in room_locations:
-                        room_locations[loc] = {'rooms': [], 'guest_fields': []}
-                    # Don't re-add if already there from FK
-                    if (room, idx) not in room_locations[loc]['rooms']:
-                        room_locations[loc]['rooms'].append((room, idx))
+            # Collect rooms via FK relationship, then by sp_ticket_id. A room is
+            # credited to the first guest in the chain it was found through
+            for room in fk_rooms.get(guest.id, []) + ticket_rooms.get(guest.ticket, []):
+                if room.pk in seen_room_ids:
+                    continue
+
+                seen_room_ids.add(room.pk)
+                all_chain_rooms.append((room, idx))
+                loc = (room.name_hotel, room.number)
+                if loc not in room_locations:
+                    room_locations[loc] = {'rooms': [], 'guest_fields': []}
+                room_locations[loc]['rooms'].append((room, idx))
 
         # Determine the ONE correct room location
         unique_locations = list(room_locations.keys())
@@ -170,57 +232,30 @@ class TransferChainFixer:
                 # User already chose
                 correct_room_loc = chosen_room
             else:
-                # Determine which room to use:
+                # Determine which room to use, scoring every location in one pass:
                 # PRIORITY 1: If one room has is_placed=True, it MUST be the correct room
-                # PRIORITY 2: Otherwise, prefer room associated with HEAD guest (earliest in chain, idx=0)
-                # PRIORITY 3: If still ambiguous, prompt user
-
-                # First, check if ANY room has is_placed=True
-                placed_locations = []
+                # PRIORITY 2: Otherwise, prefer room associated with HEAD guest (idx=0)
+                # PRIORITY 3: Otherwise, prefer the room found earliest in the chain
+                # If the best score is shared, prompt user
+                priorities = {}
                 for loc, loc_data in room_locations.items():
-                    if any(room.is_placed for room, idx in loc_data.get('rooms', [])):
-                        placed_locations.append(loc)
-
-                if len(placed_locations) == 1:
-                    # Exactly one is_placed=True room - this MUST be the correct one
-                    correct_room_loc = placed_locations[0]
-                elif len(placed_locations) > 1:
-                    # Multiple is_placed=True rooms - need user to choose
-                    changes.append(('choose_room', unique_locations, room_locations, {}))
-                    return changes
-                else:
-                    # No is_placed=True rooms - fall back to HEAD preference
-                    # Find location associated with head (idx 0)
-                    head_locations = []
-                    for loc, loc_data in room_locations.items():
-                        # Check if this location has rooms or guest fields from head (idx 0)
-                        if any(idx == 0 for room, idx in loc_data.get('rooms', [])) or \
-                           any(idx == 0 for guest, idx in loc_data.get('guest_fields', [])):
-                            head_locations.append(loc)
-
-                    if len(head_locations) == 1:
-                        # Unambiguous: head has exactly one room
-                        correct_room_loc = head_locations[0]
-                    elif len(head_locations) > 1:
-                        # Multiple head rooms - need user choice
-                        changes.append(('choose_room', unique_locations, room_locations, {}))
-                        return changes
+                    rooms = loc_data.get('rooms', [])
+                    if any(room.is_placed for room, idx in rooms):
+                        priorities[loc] = (1, 0)
+                    elif any(idx == 0 for room, idx in rooms) or \
+                         any(idx == 0 for guest, idx in loc_data.get('guest_fields', [])):
+                        priorities[loc] = (2, 0)
                     else:
-                        # No head locations - fall back to earliest position
-                        earliest_idx = min(idx for loc_data in room_locations.values()
-                                         for room, idx in loc_data.get('rooms', []))
-
-                        earliest_locations = []
-                        for loc, loc_data in room_locations.items():
-                            if any(idx == earliest_idx for room, idx in loc_data.get('rooms', [])):
-                                earliest_locations.append(loc)
+                        # locations only known from guest fields rank after every room
+                        priorities[loc] = (3, min((idx for room, idx in rooms), default=len(chain)))
 
-                        if len(earliest_locations) == 1:
-                            correct_room_loc = earliest_locations[0]
-                        else:
-                            # Multiple at same position - need user choice
-                            changes.append(('choose_room', unique_locations, room_locations, {}))
-                            return changes
+                best = min(priorities.values())
+                best_locations = [loc for loc, priority in priorities.items() if priority == best]
+                if len(best_locations) == 1:
+                    correct_room_loc = best_locations[0]
+                else:
+                    changes.append(('choose_room', unique_locations, room_locations, {}))
+                    return changes
 
         # Clear intermediate guest fields
         for guest in intermediates:
@@ -297,6 +332,22 @@ class TransferChainFixer:
 
         return changes
 
+    def confirm_changes(self, ticket_id, changes, orphan_action='ask', chosen_room=None):
+        """
+        Re-read a chain and work out its changes again, raising CommandError if they
+        no longer match the ones which were reviewed, e.g. when the chain was
+        transferred again while waiting for confirmation.
+        Returns tuple: (changes, tail_guest) built from the freshly read chain
+        """
+        chain, _head, tail = self.build_full_chain(ticket_id)
+        current = self.get_changes(chain, tail, orphan_action=orphan_action, chosen_room=chosen_room)
+
+        if change_summary(current) != change_summary(changes):
+            raise CommandError(f"Transfer chain for ticket {ticket_id} changed while waiting for confirmation, "
+                               "run again to review the new changes")
+
+        return current, tail
+
     def apply_changes(self, changes, orphan_action='ask', tail_guest=None):
         """
         Apply changes with transaction wrapping.
@@ -305,6 +356,11 @@ class TransferChainFixer:
         tail_guest: The tail Guest object to use when updating rooms
         """
         results = []
+        guests_to_update = {}
+        guest_fields = set()
+        rooms_to_update = {}
+        room_fields = set()
+        guest_cache = {}  # ticket -> Guest, for rooms moving to someone other than tail_guest
 
         with transaction.atomic():
             for change in changes:
@@ -321,7 +377,8 @@ class TransferChainFixer:
                     guest_changes = change[2]
                     for field, (old_val, new_val) in guest_changes.items():
                         setattr(obj, field, new_val)
-                    obj.save()
+                    guests_to_update[obj.pk] = obj
+                    guest_fields.update(guest_changes.keys())
                     results.append((True, f"Updated Guest {obj.email} (ticket {obj.ticket})"))
 
                 elif change_type == 'room':
@@ -334,17 +391,21 @@ class TransferChainFixer:
                     if 'guest' in room_changes:
                         new_guest_email = room_changes['guest'][1]
                         if new_guest_email:
-                            # Use the tail_guest object if email matches, otherwise look up by ticket
-                            if tail_guest and tail_guest.email == new_guest_email:
+                            # get_changes always targets the tail, so reuse the tail_guest object
+                            # when the ticket matches and only look up by ticket otherwise
+                            new_guest_ticket = metadata.get('new_guest_ticket')
+                            if tail_guest and new_guest_ticket == tail_guest.ticket:
                                 new_guest = tail_guest
-                            else:
+                            elif tail_guest and not new_guest_ticket and tail_guest.email == new_guest_email:
+                                new_guest = tail_guest
+                            elif new_guest_ticket:
                                 # Get by ticket to avoid ambiguity with duplicate emails
-                                new_guest_ticket = metadata.get('new_guest_ticket')
-                                if new_guest_ticket:
-                                    new_guest = Guest.objects.get(ticket=new_guest_ticket)
-                                else:
-                                    # Fallback - should not happen but handle gracefully
-                                    new_guest = tail_guest
+                                if new_guest_ticket not in guest_cache:
+                                    guest_cache[new_guest_ticket] = Guest.objects.get(ticket=new_guest_ticket)
+                                new_guest = guest_cache[new_guest_ticket]
+                            else:
+                                # Fallback - should not happen but handle gracefully
+                                new_guest = tail_guest
                         else:
                             new_guest = None
                         room.guest = new_guest
@@ -361,7 +422,8 @@ class TransferChainFixer:
                     if 'is_available' in room_changes:
                         room.is_available = room_changes['is_available'][1]
 
-                    room.save()
+                    rooms_to_update[room.pk] = room
+                    room_fields.update(room_changes.keys())
 
                     if is_duplicate:
                         results.append((True, f"Cleared duplicate Room {room.name_hotel} {room.number}"))
@@ -376,6 +438,19 @@ class TransferChainFixer:
                 else:
                     raise CommandError(f"Unknown change type for object")
 
+            # One UPDATE per model rather than one per row. bulk_update skips
+            # auto_now, so stamp updated_at the way save() would have
+            now = timezone.now()
+            for obj in [*guests_to_update.values(), *rooms_to_update.values()]:
+                obj.updated_at = now
+
+            if guests_to_update:
+                Guest.objects.bulk_update(guests_to_update.values(), [*guest_fields, 'updated_at'],
+                                          batch_size=roombaht_config.BULK_BATCH_SIZE)
+            if rooms_to_update:
+                Room.objects.bulk_update(rooms_to_update.values(), [*room_fields, 'updated_at'],
+                                         batch_size=roombaht_config.BULK_BATCH_SIZE)
+
         return results
 
 
@@ -412,42 +487,40 @@ class Command(BaseCommand):
                 self.stdout.write('='*80)
 
             try:
-                # Build the chain
-                chain, head, tail = fixer.build_full_chain(ticket_id)
-
-                if self.verbosity >= 1:
-                    self.stdout.write(f"\nTransfer Chain for ticket {ticket_id}:")
-                    for i, g in enumerate(chain):
-                        prefix = "  "
-                        if g == head:
-                            label = "[HEAD] "
-                        elif g == tail:
-                            label = "[TAIL - should have room] "
-                            prefix = self.style.SUCCESS("  → ")
-                        else:
-                            label = "[INTERMEDIATE] "
+                # Read the chain from one snapshot. It's only held while reading, never
+                # across the prompts below, and is re-checked before applying changes
+                with chain_snapshot():
+                    # Build the chain
+                    chain, head, tail = fixer.build_full_chain(ticket_id)
 
-                        guest_info = f"{label}{g.email} ({g.ticket})"
+                    if self.verbosity >= 1:
+                        self.stdout.write(f"\nTransfer Chain for ticket {ticket_id}:")
+                        for i, g in enumerate(chain):
+                            prefix = "  "
+                            if g == head:
+                                label = "[HEAD] "
+                            elif g == tail:
+                                label = "[TAIL - should have room] "
+                                prefix = self.style.SUCCESS("  → ")
+                            else:
+                                label = "[INTERMEDIATE] "
 
-                        # Highlight the tail
-                        if g == tail:
-                            self.stdout.write(self.style.SUCCESS(f"{prefix}{guest_info}"))
-                        else:
-                            self.stdout.write(f"{prefix}{guest_info}")
-
-                # Verify tail
-                verified_tail = fixer.find_tail(chain)
-                if verified_tail != tail:
-                    self.stdout.write(self.style.WARNING(
-                        f"  Tail mismatch: expected {tail.email if tail else 'None'}, found {verified_tail.email if verified_tail else 'None'}"
-                    ))
-                    tail = verified_tail
-
-                # Get changes needed
-                # We'll ask about orphan action and room choice if needed
-                orphan_action = None
-                chosen_room = None
-                changes = fixer.get_changes(chain, tail, orphan_action='ask', chosen_room=chosen_room)
+                            guest_info = f"{label}{g.email} ({g.ticket})"
+
+                            # Highlight the tail
+                            if g == tail:
+                                self.stdout.write(self.style.SUCCESS(f"{prefix}{guest_info}"))
+                            else:
+                                self.stdout.write(f"{prefix}{guest_info}")
+
+                    # build_full_chain read every guest transferring from this chain in
+                    # the same snapshot, so its tail is the guest nobody transferred from
+
+                    # Get changes needed
+                    # We'll ask about orphan action and room choice if needed
+                    orphan_action = None
+                    chosen_room = None
+                    changes = fixer.get_changes(chain, tail, orphan_action='ask', chosen_room=chosen_room)
 
                 # Check if user needs to choose a room
                 if changes and changes[0][0] == 'choose_room':
@@ -510,7 +583,8 @@ class Command(BaseCommand):
                             raise CommandError(f"Invalid choice: {choice}")
 
                     # Regenerate changes with chosen room
-                    changes = fixer.get_changes(chain, tail, orphan_action='ask', chosen_room=chosen_room)
+                    with chain_snapshot():
+                        changes = fixer.get_changes(chain, tail, orphan_action='ask', chosen_room=chosen_room)
 
                 # Display changes (before prompting for orphan action)
                 if not changes:
@@ -601,7 +675,8 @@ class Command(BaseCommand):
                         raise CommandError(f"Invalid choice: {choice}")
 
                     # Regenerate changes with chosen action
-                    changes = fixer.get_changes(chain, tail, orphan_action=orphan_action, chosen_room=chosen_room)
+                    with chain_snapshot():
+                        changes = fixer.get_changes(chain, tail, orphan_action=orphan_action, chosen_room=chosen_room)
 
                 # Apply changes if not dry run
                 if dry_run:
@@ -620,8 +695,13 @@ class Command(BaseCommand):
                             self.stdout.write(self.style.WARNING("\nSkipping this ticket"))
                             continue
 
-                    # Apply the changes
-                    results = fixer.apply_changes(changes, orphan_action=orphan_action or 'leave_orphan', tail_guest=tail)
+                    # Re-read the chain in a short transaction and apply the changes,
+                    # provided they are still the ones which were confirmed
+                    with chain_snapshot():
+                        changes, tail = fixer.confirm_changes(ticket_id, changes,
+                                                              orphan_action=orphan_action or 'ask',
+                                                              chosen_room=chosen_room)
+                        results = fixer.apply_changes(changes, orphan_action=orphan_action or 'leave_orphan', tail_guest=tail)
 
                     self.stdout.write("")  # Blank line
                     for success, message in results:
@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand, CommandError
-from fuzzywuzzy import fuzz
+from rapidfuzz import fuzz
 from reservations.models import Room, Guest
 from reservations.checks import room_guest_name_mismatch
 from reservations.management import getch
@@ -45,7 +45,7 @@ class Command(BaseCommand):
             base_name = room.guest.name if room.guest else ''
             # First try to fuzz match as before
             for name in occupants:
-                fuzziness = fuzz.ratio(base_name, name)
+                fuzziness = round(fuzz.ratio(base_name, name))
                 if fuzziness >= kwargs['fuzziness']:
                     matched_any = True
                     # Only update existing guest records if we have an original guest to base them on
@@ -6,6 +6,7 @@ import time
 from datetime import datetime
 from pathlib import Path
 
+from django.core.mail import get_connection
 from django.core.management.base import BaseCommand
 from jinja2 import Environment, FileSystemLoader, TemplateNotFound
 
@@ -271,6 +272,21 @@ class Command(BaseCommand):
         """Send emails in batches with timing control"""
         sleep_time = batch_time / batch_size if batch_size > 0 else 0
 
+        # send everything over one SMTP session rather than a new one per email
+        connection = None
+        if not dry_run and roombaht_config.SEND_MAIL:
+            connection = get_connection()
+            connection.open()
+
+        try:
+            self._send_emails(emails, template_name, subject, template_vars,
+                              state, sleep_time, dry_run, connection)
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def _send_emails(self, emails, template_name, subject, template_vars,
+                     state, sleep_time, dry_run, connection):
         for i, email in enumerate(emails):
             # Build context
             context = self._get_template_context(email, template_vars)
@@ -302,7 +318,7 @@ class Command(BaseCommand):
                 self.stdout.write(f'  Context: {context}')
                 state['sent_emails'].append(email)
             else:
-                success = send_email([email], subject, body)
+                success = send_email([email], subject, body, connection=connection)
                 if success:
                     logger.info(f'Sent email to {email}')
                     state['sent_emails'].append(email)
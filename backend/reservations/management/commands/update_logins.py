@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from django.db.models import Count
 from reservations.models import Guest
 import reservations.config as roombaht_config
 
@@ -12,30 +13,13 @@ class Command(BaseCommand):
     def handle(self, *args, **kwargs):
         dry_run = bool(kwargs.get('dry_run'))
 
-        candidates = []
-
-        # Collect distinct, non-empty emails to consider
-        emails = Guest.objects.values_list('email', flat=True).distinct()
-        for email in emails:
-            if not email:
-                continue
-
-            group = Guest.objects.filter(email=email)
-
-            # If any member of the group looks like a visible-hotel single-room guest,
-            # then any members of that group with can_login=False should be enabled.
-            try:
-                visible_single = any(
-                    (g.room_set.count() == 1 and g.hotel in roombaht_config.VISIBLE_HOTELS)
-                    for g in group
-                )
-            except Exception:
-                # Be conservative if counting fails for some reason
-                visible_single = False
-
-            if visible_single:
-                for g in group.filter(can_login=False):
-                    candidates.append(g)
+        # If any member of an email group looks like a visible-hotel single-room guest,
+        # then any members of that group with can_login=False should be enabled.
+        visible_emails = Guest.objects.exclude(email='') \
+                                      .annotate(rc=Count('room')) \
+                                      .filter(rc=1, hotel__in=roombaht_config.VISIBLE_HOTELS) \
+                                      .values('email')
+        candidates = list(Guest.objects.filter(email__in=visible_emails, can_login=False).order_by('id'))
 
         if len(candidates) == 0:
             self.stdout.write('No guests to update')
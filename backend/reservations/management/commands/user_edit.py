@@ -39,7 +39,7 @@ class Command(BaseCommand):
             raise CommandError('Invalid option passed to --adult')
 
         guest_entries = Guest.objects.filter(email=kwargs['email'])
-        if guest_entries.count() == 0:
+        if not guest_entries.exists():
             raise CommandError(f"No user found with email {kwargs['email']}")
 
         if kwargs['password']:
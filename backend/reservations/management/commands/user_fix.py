@@ -7,7 +7,7 @@ from reservations.ingest_models import SecretPartyGuestIngest
 from reservations.services.room_assignment_service import RoomAssignmentService
 from reservations.services.guest_management_service import GuestManagementService
 from reservations.helpers import phrasing
-from reservations.constants import ROOM_LIST
+from reservations.constants import ROOM_PRODUCTS
 from reservations.management import getch
 import reservations.config as roombaht_config
 
@@ -141,7 +141,7 @@ class Command(BaseCommand):
                 f"Guest {guest.email} already has room assigned: {guest.hotel} {guest.room_number}"
             )
 
-        if guest.room_set.count() > 0:
+        if guest.room_set.exists():
             room_list = ', '.join([f"{r.name_hotel} {r.number}" for r in guest.room_set.all()])
             raise CommandError(
                 f"Guest {guest.email} already has Room objects assigned: {room_list}"
@@ -177,7 +177,7 @@ class Command(BaseCommand):
                 )
             raise CommandError(f"Failed to fetch Secret Party data: {e}")
 
-        # Find ticket data and convert to SecretPartyGuestIngest object (like checks.py does)
+        # Find ticket data and convert to SecretPartyGuestIngest object (like checks/secret_party.py does)
         guest_ingest = None
         for ticket_data in sp_data:
             try:
@@ -199,11 +199,7 @@ class Command(BaseCommand):
 
     def _validate_room_product(self, sp_product):
         """Validate that the product is a room product."""
-        room_products = set()
-        for room_type, room_data in ROOM_LIST.items():
-            room_products.update(room_data['rooms'])
-
-        if sp_product not in room_products:
+        if sp_product not in ROOM_PRODUCTS:
             raise CommandError(
                 f"Product '{sp_product}' is not a room product. "
                 "This guest does not qualify for room assignment."
@@ -38,7 +38,7 @@ class Command(BaseCommand):
         else:
             guest_entries = Guest.objects.filter(email=kwargs['search'])
 
-        if guest_entries.count() == 0:
+        if not guest_entries.exists():
             raise CommandError(f"No user found with search term {kwargs['search']} - did you specify right search type?")
 
         guest = guest_entries[0]
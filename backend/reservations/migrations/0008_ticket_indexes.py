@@ -0,0 +1,28 @@
+# Generated by Django 4.1.1 on 2026-10-15 22:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0007_swap'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='guest',
+            name='ticket',
+            field=models.CharField(db_index=True, max_length=20, verbose_name='Ticket'),
+        ),
+        migrations.AlterField(
+            model_name='guest',
+            name='transfer',
+            field=models.CharField(db_index=True, max_length=20, verbose_name='Transfer'),
+        ),
+        migrations.AlterField(
+            model_name='room',
+            name='sp_ticket_id',
+            field=models.CharField(blank=True, db_index=True, max_length=20, null=True, verbose_name='SecretPartyTicketID'),
+        ),
+    ]
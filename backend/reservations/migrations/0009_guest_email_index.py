@@ -0,0 +1,18 @@
+# Generated by Django 4.1.1 on 2026-10-15 22:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0008_ticket_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='guest',
+            name='email',
+            field=models.EmailField(db_index=True, max_length=254),
+        ),
+    ]
@@ -33,9 +33,9 @@ class Guest(DirtyFieldsMixin, models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     name = models.CharField("Name", max_length=240)
-    email = models.EmailField()
-    ticket = models.CharField("Ticket", max_length=20)
-    transfer = models.CharField("Transfer", max_length=20)
+    email = models.EmailField(db_index=True)
+    ticket = models.CharField("Ticket", max_length=20, db_index=True)
+    transfer = models.CharField("Transfer", max_length=20, db_index=True)
     invitation = models.CharField("Invitation", max_length=20)
     jwt = models.CharField("JWT", max_length=240)
     room_number = models.CharField("RoomNumber", max_length=20, blank=True, null=True)
@@ -94,7 +94,7 @@ class Room(DirtyFieldsMixin, models.Model):
     swap_time = models.DateTimeField(blank=True, null=True)
     _check_in = models.DateField(blank=True, null=True, db_column='check_in')
     _check_out = models.DateField(blank=True, null=True, db_column='check_out')
-    sp_ticket_id = models.CharField("SecretPartyTicketID", max_length=20, blank=True, null=True)
+    sp_ticket_id = models.CharField("SecretPartyTicketID", max_length=20, blank=True, null=True, db_index=True)
     primary = models.CharField("PrimaryContact", max_length=200)
     secondary = models.CharField("SecondaryContact", max_length=200)
     placed_by_roombot = models.BooleanField("PlacedByRoombot", default=False)
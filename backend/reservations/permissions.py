@@ -0,0 +1,27 @@
+import logging
+import sys
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import BasePermission
+import reservations.config as roombaht_config
+
+logging.basicConfig(stream=sys.stdout, level=roombaht_config.LOGLEVEL)
+logger = logging.getLogger('ViewLogger_permissions')
+
+class FeatureNotEnabled(APIException):
+    status_code = status.HTTP_501_NOT_IMPLEMENTED
+    default_code = 'feature_not_enabled'
+
+
+class FeatureEnabled(BasePermission):
+    """Return 501 if the feature named by a subclass is disabled"""
+    feature = None
+    message = 'Feature is not enabled'
+
+    def has_permission(self, request, view):
+        if self.feature not in roombaht_config.FEATURES_SET:
+            logger.warning(f"Access attempt to disabled feature: {self.feature}")
+            raise FeatureNotEnabled({'error': self.message})
+
+        return True
@@ -115,7 +115,8 @@ def hotel_export(hotel, output_dir=None):
         'secondary_name'
     ]
     rooms = Room.objects.filter(name_hotel=hotel.title())
-    if rooms.count() == 0:
+    # evaluating the queryset here also caches the rooms for the loop below
+    if not rooms:
         raise Exception("No rooms found for hotel %s" % hotel)
 
     rows = []
@@ -157,7 +158,8 @@ def rooming_list_export(hotel, output_dir=None):
     out_dir = output_dir or roombaht_config.TEMP_DIR
 
     rooms = Room.objects.filter(name_hotel=hotel.title())
-    if rooms.count() == 0:
+    # evaluating the queryset here also caches the rooms for the loop below
+    if not rooms:
         raise Exception("No rooms found for hotel %s" % hotel)
 
     cols = [
@@ -225,8 +227,10 @@ def rooming_list_export(hotel, output_dir=None):
 def dump_guest_rooms(output_dir=None):
     """Dump guest and room tables to two CSVs. Returns list with guest_file then room_file."""
     out_dir = output_dir or roombaht_config.TEMP_DIR
-    guest_dump_file = os.path.join(out_dir, f"guest_dump-{ts_suffix()}.csv")
-    room_dump_file = os.path.join(out_dir, f"room_dump-{ts_suffix()}.csv")
+    # one suffix so the pair of dumps always match up
+    suffix = ts_suffix()
+    guest_dump_file = os.path.join(out_dir, f"guest_dump-{suffix}.csv")
+    room_dump_file = os.path.join(out_dir, f"room_dump-{suffix}.csv")
     guests = Guest.objects.all()
     logger.debug('[-] dumping guests and room tables')
     with open(guest_dump_file, 'w+') as guest_file:
@@ -2,9 +2,15 @@ import json
 import logging
 import requests
 import hashlib
+import time
 from typing import Optional, List, Dict, Any, Union
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import timedelta
+
+
+# parsed cache file contents, keyed by path and tracked against the file mtime
+# so repeated reads of an unchanged cache within a process skip json parsing
+_CACHE_MEMO: Dict[Path, tuple] = {}
 
 
 class SecretPartyAPIError(Exception):
@@ -80,19 +86,25 @@ class SecretPartyClient:
             return None
 
         try:
-            cache_mtime = datetime.fromtimestamp(cache_file.stat().st_mtime)
-            cache_age = datetime.now() - cache_mtime
+            cache_stat = cache_file.stat()
+            cache_age = time.time() - cache_stat.st_mtime
 
-            if cache_age >= self.cache_max_age:
-                self.logger.info(f"Cache expired (age: {cache_age}, max: {self.cache_max_age}) for {cache_file}")
+            if cache_age >= self.cache_max_age.total_seconds():
+                self.logger.info(f"Cache expired (age: {timedelta(seconds=cache_age)}, max: {self.cache_max_age}) for {cache_file}")
                 return None
 
-            with open(cache_file, 'r') as f:
-                data = json.load(f)
-                self.logger.info(f"Loaded {len(data)} tickets from cache {cache_file} (age: {cache_age})")
-                return data
+            # callers may reorder what they get back, so always hand out a copy
+            memo = _CACHE_MEMO.get(cache_file)
+            if memo is not None and memo[0] == cache_stat.st_mtime_ns:
+                self.logger.debug(f"Using {len(memo[1])} already loaded tickets from cache {cache_file}")
+                return list(memo[1])
+
+            data = json.loads(cache_file.read_bytes())
+            _CACHE_MEMO[cache_file] = (cache_stat.st_mtime_ns, data)
+            self.logger.info(f"Loaded {len(data)} tickets from cache {cache_file} (age: {timedelta(seconds=cache_age)})")
+            return list(data)
 
-        except (json.JSONDecodeError, IOError, OSError) as e:
+        except (json.JSONDecodeError, UnicodeDecodeError, IOError, OSError) as e:
             self.logger.warning(f"Failed to read cache file {cache_file}: {e}")
             return None
 
@@ -108,8 +120,11 @@ class SecretPartyClient:
 
         try:
             cache_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(cache_file, 'w') as f:
-                json.dump(data, f)
+            # encode in one shot; json.dump writes the document piecemeal
+            cache_file.write_text(json.dumps(data))
+            # remember what was just written so the next read in this process,
+            # e.g. the next system check, doesn't parse it back off disk
+            _CACHE_MEMO[cache_file] = (cache_file.stat().st_mtime_ns, list(data))
             self.logger.info(f"Cached {len(data)} tickets to {cache_file}")
         except Exception as e:
             self.logger.warning(f"Failed to write cache to {cache_file}: {e}")
@@ -1,7 +1,7 @@
 import logging
 import traceback
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
 from pathlib import Path
 
 from reservations.helpers import ingest_csv
@@ -47,7 +47,7 @@ class GuestIngestionService:
         config = config or {}
 
         if source_name.lower() == 'secretparty':
-            return self._fetch_from_secretparty()
+            return self._fetch_from_secretparty(config.get('tickets'))
         elif source_name.lower() == 'csv':
             return self._fetch_from_csv(config)
         elif source_name.lower() == 'manual':
@@ -55,15 +55,21 @@ class GuestIngestionService:
         else:
             raise ValueError(f"Unsupported source: {source_name}")
 
-    def _fetch_from_secretparty(self) -> Dict[str, Any]:
+    def fetch_secretparty_tickets(self, force: bool = False) -> List[Dict[str, Any]]:
+        """Export the add-on tickets a SecretParty ingest works from, newest purchase first"""
         self.logger.info("Fetching data from SecretParty API")
-
+        return SecretPartyClient(SP_API_KEY).export_tickets(
+            search=[{"label": "type: add-on"}],
+            reverse=True,
+            order='purchase_date',
+            force=force
+        )
+
+    def _fetch_from_secretparty(self, tickets: List[Dict[str, Any]] = None) -> Dict[str, Any]:
         try:
-            tickets = SecretPartyClient(SP_API_KEY).export_tickets(
-                search=[{"label": "type: add-on"}],
-                reverse=True,
-                order='purchase_date'
-            )
+            # callers which already have the export can pass it in rather than fetch it again
+            if tickets is None:
+                tickets = self.fetch_secretparty_tickets()
 
             return {
                 'tickets': tickets,
@@ -1,9 +1,9 @@
 import logging
-from typing import Dict, List, Set, Optional
+from typing import Dict, List, Optional
 
 from reservations.models import Guest, Room
 from reservations import config as roombaht_config
-from reservations.constants import ROOM_LIST
+from reservations.constants import ROOM_PRODUCTS
 
 logger = logging.getLogger(__name__)
 
@@ -11,21 +11,12 @@ logger = logging.getLogger(__name__)
 class GuestValidationService:
 
     def __init__(self):
-        self._room_products = self._build_room_products_set()
+        self._room_products = ROOM_PRODUCTS
         self._ignored_transactions = set(roombaht_config.IGNORE_TRANSACTIONS)
         self._guest_hotels = set(roombaht_config.GUEST_HOTELS)
         logger.debug("GuestValidationService initialized with %d room products, %d ignored transactions, %d guest hotels",
                      len(self._room_products), len(self._ignored_transactions), len(self._guest_hotels))
 
-    def _build_room_products_set(self) -> Set[str]:
-        room_products = set()
-        for _take3_product, hotel_details in ROOM_LIST.items():
-            for product in hotel_details.get('rooms', []):
-                room_products.add(product)
-
-        logger.debug("Built room products list with %d products", len(room_products))
-        return room_products
-
     def is_valid_room_product(self, product: str) -> bool:
         return product in self._room_products
 
@@ -1,5 +1,5 @@
 import logging
-from fuzzywuzzy import process, fuzz
+from rapidfuzz import process, fuzz, utils
 from ..models import Guest, Room
 from .transfer_chain_service import TransferChainService
 from reservations.helpers import phrasing
@@ -65,7 +65,7 @@ class OrphanReconciliationService:
                 if room.primary != guest.name:
                     logger.warning("names do not match for orphan room %s %s (%s, %s, %s fuzziness)",
                                    room.name_hotel, room.number, room.primary, guest.name,
-                                   fuzz.ratio(room.primary, guest.name))
+                                   round(fuzz.ratio(room.primary, guest.name)))
                     continue
 
                 if room.primary == '':
@@ -128,11 +128,12 @@ class OrphanReconciliationService:
                     logger.warning("Unable to find guest %s for (non-comp) orphan room %s %s",
                                    room.primary, room.name_hotel, room.number)
                     possibilities = [x for x in process.extract(room.primary,
-                                                                [f"{g.first_name} {g.last_name}" for g in guest_rows]) if x[1] > 85]
+                                                                [f"{g.first_name} {g.last_name}" for g in guest_rows],
+                                                                processor=utils.default_process) if x[1] > 85]
                     if len(possibilities) > 0:
                         logger.warning("Found %s fuzzy name possibilities in CSV for %s in orphan room %s %s: %s",
                                        len(possibilities), room.primary, room.name_hotel, room.number,
-                                       ','.join([f"{x[0]}:{x[1]}" for x in possibilities]))
+                                       ','.join([f"{x[0]}:{round(x[1])}" for x in possibilities]))
                     continue
 
                 if room.sp_ticket_id:
@@ -0,0 +1,436 @@
+from unittest.mock import patch
+from django.core.checks import registry
+from django.test import TestCase
+
+from reservations.models import Room, Guest
+from reservations.checks.user import guest_drama_check, intermediate_transfer_guest_check
+from reservations.checks.room import room_drama_check
+from reservations.checks.secret_party import secret_party_data_check, secret_party_refunded_check, sp_client
+from reservations.checks import run_parallel, room_guest_name_mismatch
+from reservations.checks.deploy import RESERVATION_CHECKS, reservations_check
+
+
+def make_guest(**kwargs):
+    defaults = {
+        'name': 'Test Guest',
+        'email': 'guest@example.com',
+        'ticket': '',
+        'transfer': '',
+        'invitation': '',
+        'jwt': 'jwt',
+        'hotel': 'Ballys',
+        'can_login': True
+    }
+    defaults.update(kwargs)
+    return Guest.objects.create(**defaults)
+
+
+def make_room(**kwargs):
+    defaults = {
+        'number': '500',
+        'name_take3': 'King',
+        'name_hotel': 'Ballys',
+        'primary': 'Test Guest',
+        'secondary': '',
+        'check_in': '11/14/2024',
+        'check_out': '11/17/2024'
+    }
+    defaults.update(kwargs)
+    room = Room(**{k: v for k, v in defaults.items() if k not in ('check_in', 'check_out')})
+    room.check_in = defaults['check_in']
+    room.check_out = defaults['check_out']
+    room.save()
+    return room
+
+
+def messages(errors):
+    return [e.msg for e in errors]
+
+
+class TestRunParallel(TestCase):
+    def test_results_are_combined_in_order(self):
+        def first(app_configs, **kwargs):
+            return ['one', 'two']
+
+        def second(app_configs, **kwargs):
+            return []
+
+        def third(app_configs, **kwargs):
+            return [kwargs['databases']]
+
+        self.assertEqual(run_parallel([first, second, third], None, databases=['default']),
+                         ['one', 'two', ['default']])
+
+    def test_no_checks(self):
+        self.assertEqual(run_parallel([], None), [])
+
+    def test_check_failure_is_raised(self):
+        def broken(app_configs, **kwargs):
+            raise ValueError('nope')
+
+        with self.assertRaises(ValueError):
+            run_parallel([broken], None)
+
+    def test_each_check_registered_once(self):
+        registered = registry.registry.get_checks(include_deployment_checks=True)
+        self.assertEqual(registered.count(reservations_check), 1)
+        for check in RESERVATION_CHECKS:
+            self.assertNotIn(check, registered)
+        self.assertEqual(len(set(RESERVATION_CHECKS)), len(RESERVATION_CHECKS))
+
+
+class TestGuestDramaCheck(TestCase):
+    def test_clean_database_has_no_errors(self):
+        guest = make_guest(ticket='T100', room_number='500')
+        make_room(guest=guest, sp_ticket_id='T100')
+
+        self.assertEqual(guest_drama_check(None), [])
+
+    def test_empty_jwt(self):
+        make_guest(ticket='T100', jwt='')
+
+        msgs = messages(guest_drama_check(None))
+        self.assertIn("Guest guest@example.com has an empty jwt field!", msgs)
+
+    def test_empty_jwt_without_login(self):
+        make_guest(ticket='T100', jwt='', can_login=False)
+
+        msgs = messages(guest_drama_check(None))
+        self.assertNotIn("Guest guest@example.com has an empty jwt field!", msgs)
+
+    def test_query_count_is_constant(self):
+        for i in range(5):
+            guest = make_guest(email=f'guest{i}@example.com', ticket=f'T{i}', room_number=str(500 + i))
+            make_room(guest=guest, number=str(500 + i), sp_ticket_id=f'T{i}')
+
+        with self.assertNumQueries(5):
+            self.assertEqual(guest_drama_check(None), [])
+
+    def test_shared_ticket(self):
+        one = make_guest(email='one@example.com', ticket='T100')
+        two = make_guest(email='two@example.com', ticket='T100')
+        make_guest(email='three@example.com', ticket='T200')
+
+        msgs = messages(guest_drama_check(None))
+        self.assertIn("Guest one@example.com, ticket T100 shared with other users", msgs)
+        self.assertIn("Guest two@example.com, ticket T100 shared with other users", msgs)
+        self.assertNotIn("Guest three@example.com, ticket T200 shared with other users", msgs)
+        self.assertEqual(msgs.count(f"Ticket T100 assigned to multiple guest entries: one@example.com (id={one.id}), two@example.com (id={two.id})"),
+                         1)
+
+    def test_visible_hotel_guest_should_login(self):
+        guest = make_guest(ticket='T100', room_number='500')
+        make_room(guest=guest, sp_ticket_id='T100')
+        other = make_guest(ticket='T200', can_login=False)
+
+        msgs = messages(guest_drama_check(None))
+        self.assertIn(f"Guest guest@example.com (id={other.id}) should be able to login!", msgs)
+
+    def test_multiple_rooms(self):
+        guest = make_guest(ticket='T100', room_number='500')
+        make_room(guest=guest, sp_ticket_id='T100')
+        make_room(guest=guest, number='501')
+
+        msgs = messages(guest_drama_check(None))
+        self.assertIn(f"Guest records with multiple associated rooms: guest@example.com (id={guest.id}, rooms=2)", msgs)
+
+    def test_multiple_rooms_lists_only_offenders(self):
+        one = make_guest(email='one@example.com', ticket='T100', room_number='500')
+        make_room(guest=one, number='500', sp_ticket_id='T100')
+        make_room(guest=one, number='501')
+        single = make_guest(email='single@example.com', ticket='T200', room_number='502')
+        make_room(guest=single, number='502', sp_ticket_id='T200')
+        two = make_guest(email='two@example.com', ticket='T300', room_number='503')
+        make_room(guest=two, number='503', sp_ticket_id='T300')
+        make_room(guest=two, number='504')
+
+        msgs = [msg for msg in messages(guest_drama_check(None)) if 'multiple associated rooms' in msg]
+        self.assertEqual(msgs, ["Guest records with multiple associated rooms: "
+                                f"one@example.com (id={one.id}, rooms=2), two@example.com (id={two.id}, rooms=2)"])
+
+    def test_ticket_with_multiple_rooms(self):
+        make_room(number='500', sp_ticket_id='T100')
+        make_room(number='501', sp_ticket_id='T100')
+
+        msgs = messages(guest_drama_check(None))
+        self.assertIn("Ticket T100 assigned to multiple rooms: Ballys 500, Ballys 501", msgs)
+
+    def test_rooms_without_tickets_are_not_shared(self):
+        make_room(number='500', sp_ticket_id='')
+        make_room(number='501', sp_ticket_id='')
+        make_room(number='502', sp_ticket_id=None)
+        make_room(number='503', sp_ticket_id=None)
+
+        msgs = messages(guest_drama_check(None))
+        self.assertFalse([msg for msg in msgs if 'assigned to multiple rooms' in msg])
+
+
+class TestIntermediateTransferGuestCheck(TestCase):
+    def test_no_transfers(self):
+        make_guest(ticket='T100')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(intermediate_transfer_guest_check(None), [])
+
+    def test_intermediate_guest_with_room(self):
+        original = make_guest(email='orig@example.com', ticket='T100', room_number='500')
+        make_guest(email='new@example.com', ticket='T200', transfer='T100')
+        make_room(guest=original, sp_ticket_id='T100')
+
+        with self.assertNumQueries(2):
+            errors = intermediate_transfer_guest_check(None)
+            [str(e) for e in errors]
+
+        msgs = messages(errors)
+        self.assertEqual(len(msgs), 2)
+        self.assertIn("has room_number '500'", msgs[0])
+        self.assertIn("has Room objects assigned: Ballys 500", msgs[1])
+
+    def test_query_count_does_not_grow_with_guests(self):
+        for i in range(5):
+            original = make_guest(email=f'orig{i}@example.com', ticket=f'T10{i}', room_number=f'50{i}')
+            make_guest(email=f'new{i}@example.com', ticket=f'T20{i}', transfer=f'T10{i}')
+            make_room(guest=original, number=f'50{i}', sp_ticket_id=f'T10{i}')
+
+        with self.assertNumQueries(2):
+            errors = intermediate_transfer_guest_check(None)
+            [str(e) for e in errors]
+
+        self.assertEqual(len(errors), 10)
+
+
+class TestRoomGuestNameMismatch(TestCase):
+    def setUp(self):
+        self.room = make_room(guest=make_guest(ticket='T100', room_number='500'), sp_ticket_id='T100')
+
+    @patch('reservations.checks.roombaht_config.NAME_FUZZ_FACTOR', 75)
+    def test_score_rounded_to_threshold(self):
+        with patch('reservations.checks.fuzz.ratio', return_value=74.6):
+            self.assertFalse(room_guest_name_mismatch(self.room))
+
+        with patch('reservations.checks.fuzz.ratio', return_value=74.4):
+            self.assertTrue(room_guest_name_mismatch(self.room))
+
+    def test_no_guest(self):
+        self.assertFalse(room_guest_name_mismatch(make_room(number='501')))
+
+
+class TestRoomDramaCheck(TestCase):
+    def test_clean_database_has_no_errors(self):
+        guest = make_guest(ticket='T100', room_number='500')
+        make_room(guest=guest, sp_ticket_id='T100')
+
+        self.assertEqual(room_drama_check(None), [])
+
+    def test_room_number_mismatch(self):
+        guest = make_guest(ticket='T100', room_number='501')
+        make_room(guest=guest, sp_ticket_id='T100')
+
+        msgs = messages(room_drama_check(None))
+        self.assertIn("Room/guest number mismatch Ballys 500 / guest@example.com Ballys 501", msgs)
+        self.assertIn("Ticket T100 room/guest number mismatch 500 / 501", msgs)
+
+    def test_name_mismatch(self):
+        guest = make_guest(ticket='T100', room_number='500', name='Somebody Else')
+        make_room(guest=guest, sp_ticket_id='T100')
+
+        msgs = messages(room_drama_check(None))
+        self.assertIn("Room/guest name mismatch Ballys 500 Test Guest / Somebody Else", msgs)
+
+    def test_missing_ticket_owner(self):
+        make_room(sp_ticket_id='T100')
+
+        msgs = messages(room_drama_check(None))
+        self.assertIn("Original owner of Ballys 500 with ticket T100 not found", msgs)
+        self.assertIn("Room 500 (Ballys) sp_ticket_id T100 missing guest", msgs)
+
+    def test_multiple_ticket_owners(self):
+        guest = make_guest(email='one@example.com', ticket='T100', room_number='500')
+        make_guest(email='two@example.com', ticket='T100', room_number='500')
+        make_room(guest=guest, sp_ticket_id='T100')
+
+        msgs = messages(room_drama_check(None))
+        self.assertIn("Multiple guests found with ticket T100 for room Ballys 500", msgs)
+
+    def test_transfer_owner(self):
+        make_guest(email='orig@example.com', ticket='T100', room_number='500', name='Orig Guest')
+        new_guest = make_guest(email='new@example.com', ticket='T200', transfer='T100', room_number='500',
+                               name='New Guest')
+        make_room(guest=new_guest, sp_ticket_id='T100', primary='Third Party', number='501')
+
+        with self.assertNumQueries(3):
+            errors = room_drama_check(None)
+            [str(e) for e in errors]
+
+        msgs = messages(errors)
+        self.assertIn("Room 501 (Ballys) Ticket T100 transfer T200 room/guest number mismatch 501 / 500", msgs)
+        self.assertIn("Room 501 (Ballys) Ticket T100 transfer T200 room/guest name mismatch Third Party / New Guest", msgs)
+
+    def test_query_count_does_not_grow_with_rooms(self):
+        for number in range(500, 510):
+            guest = make_guest(ticket=f"T{number}", room_number=str(number))
+            make_room(guest=guest, number=str(number), sp_ticket_id=f"T{number}")
+
+        with self.assertNumQueries(3):
+            room_drama_check(None)
+
+    def test_blank_dates(self):
+        room = make_room()
+        Room.objects.filter(id=room.id).update(_check_in=None)
+
+        msgs = messages(room_drama_check(None))
+        self.assertIn("Room Ballys 500 has blank check-in date", msgs)
+
+    def test_name_match_runs_once_per_room(self):
+        guest = make_guest(ticket='T100', room_number='500')
+        make_room(guest=guest, sp_ticket_id='T100')
+        make_room(number='501')
+
+        with patch('reservations.checks.room.room_guest_name_mismatch',
+                   side_effect=lambda room: room.guest is not None) as mock_mismatch:
+            msgs = messages(room_drama_check(None))
+
+        self.assertEqual(mock_mismatch.call_count, 2)
+        self.assertIn("Room Ballys 500 T100 room/guest name mismatch Test Guest / Test Guest", msgs)
+
+
+def sp_ticket(code, product="01.1 Bally's - Standard King", transferred_from=''):
+    return {
+        'code': code,
+        'first_name': 'Test',
+        'last_name': 'Guest',
+        'email': 'guest@example.com',
+        'product': {'name': product},
+        'transferred_from': {'code': transferred_from},
+        'status': 'active'
+    }
+
+
+@patch('reservations.config.SP_SYSTEM_CHECKS', True)
+@patch('reservations.checks.secret_party.sp_client')
+class TestSecretPartyDataCheck(TestCase):
+    def run_check(self, mock_client, tickets):
+        mock_client.return_value.export_tickets.return_value = tickets
+        return secret_party_data_check(None)
+
+    def test_skipped_when_disabled(self, mock_client):
+        with patch('reservations.config.SP_SYSTEM_CHECKS', False):
+            self.assertEqual(secret_party_data_check(None), [])
+
+        mock_client.assert_not_called()
+
+    def test_assigned_room(self, mock_client):
+        guest = make_guest(ticket='T100', room_number='500')
+        make_room(guest=guest, sp_ticket_id='T100')
+
+        self.assertEqual(self.run_check(mock_client, [sp_ticket('T100')]), [])
+
+    def test_ignores_non_room_products(self, mock_client):
+        with patch('reservations.checks.secret_party.SecretPartyGuestIngest.from_source') as mock_ingest:
+            self.assertEqual(self.run_check(mock_client, [sp_ticket('T100', product='General Admission')]), [])
+
+        mock_ingest.assert_not_called()
+
+    def test_ignores_transferred_tickets(self, mock_client):
+        make_guest(ticket='T200', transfer='T100', room_number='500')
+        self.assertEqual(self.run_check(mock_client, [sp_ticket('T100')]), [])
+
+    def test_missing_guest(self, mock_client):
+        msgs = messages(self.run_check(mock_client, [sp_ticket('T100')]))
+        self.assertEqual(msgs, ["Ticket T100 with room product '01.1 Bally's - Standard King' exists in Secret Party but not in database"])
+
+    def test_multiple_guests(self, mock_client):
+        make_guest(ticket='T100')
+        make_guest(ticket='T100')
+
+        msgs = messages(self.run_check(mock_client, [sp_ticket('T100')]))
+        self.assertIn("Multiple Guest records found for ticket T100", msgs)
+
+    def test_no_room(self, mock_client):
+        make_guest(ticket='T100')
+
+        msgs = messages(self.run_check(mock_client, [sp_ticket('T100')]))
+        self.assertEqual(msgs, ["(ticket T100) has room product '01.1 Bally's - Standard King' in Secret Party but no room assigned in database"])
+
+    def test_room_number_without_room(self, mock_client):
+        make_guest(ticket='T100', room_number='500')
+
+        msgs = messages(self.run_check(mock_client, [sp_ticket('T100')]))
+        self.assertEqual(msgs, ["(ticket T100) has room_number='500' but no Room object with associated guest"])
+
+    def test_bad_ticket_data(self, mock_client):
+        msgs = messages(self.run_check(mock_client, [{'code': 'T100'}]))
+        self.assertEqual(len(msgs), 1)
+        self.assertTrue(msgs[0].startswith("Error processing Secret Party ticket data"))
+
+    def test_fetch_failure(self, mock_client):
+        mock_client.return_value.export_tickets.side_effect = Exception('nope')
+        with patch('reservations.config.SP_API_KEY', ''):
+            msgs = messages(secret_party_data_check(None))
+
+        self.assertEqual(msgs, ["SP_API_KEY not configured and no cached data available"])
+
+
+@patch('reservations.config.SP_SYSTEM_CHECKS', True)
+@patch('reservations.checks.secret_party.sp_client')
+class TestSecretPartyRefundedCheck(TestCase):
+    def run_check(self, mock_client, tickets):
+        mock_client.return_value.export_tickets.return_value = tickets
+        return secret_party_refunded_check(None)
+
+    def test_skipped_when_disabled(self, mock_client):
+        with patch('reservations.config.SP_SYSTEM_CHECKS', False):
+            self.assertEqual(secret_party_refunded_check(None), [])
+
+        mock_client.assert_not_called()
+
+    def test_refunded_without_guest(self, mock_client):
+        self.assertEqual(self.run_check(mock_client, [sp_ticket('T100')]), [])
+
+    def test_refunded_without_room(self, mock_client):
+        make_guest(ticket='T100')
+        self.assertEqual(self.run_check(mock_client, [sp_ticket('T100')]), [])
+
+    def test_refunded_with_room(self, mock_client):
+        with_number = make_guest(email='number@example.com', ticket='T100', room_number='500')
+        with_room = make_guest(email='room@example.com', ticket='T200')
+        make_room(guest=with_room, number='501', sp_ticket_id='T200')
+        make_guest(email='clean@example.com', ticket='T300')
+
+        with self.assertNumQueries(1):
+            errors = self.run_check(mock_client, [sp_ticket('T100'), sp_ticket('T200'), sp_ticket('T300')])
+
+        self.assertEqual(messages(errors), ["Refunded ticket T100 still has a room assigned (room_number='500')",
+                                            "Refunded ticket T200 still has a room assigned (room_number='None')"])
+        self.assertEqual([e.obj for e in errors], [with_number, with_room])
+
+    def test_ignores_non_room_products(self, mock_client):
+        make_guest(ticket='T100', room_number='500')
+        self.assertEqual(self.run_check(mock_client, [sp_ticket('T100', product='General Admission')]), [])
+
+    def test_multiple_guests(self, mock_client):
+        make_guest(ticket='T100')
+        make_guest(ticket='T100')
+
+        msgs = messages(self.run_check(mock_client, [sp_ticket('T100')]))
+        self.assertEqual(msgs, ["Multiple Guest records found for refunded ticket T100"])
+
+    def test_bad_ticket_data(self, mock_client):
+        msgs = messages(self.run_check(mock_client, [{'code': 'T100'}]))
+        self.assertEqual(len(msgs), 1)
+        self.assertTrue(msgs[0].startswith("Error processing refunded Secret Party ticket data"))
+
+
+@patch('reservations.checks.secret_party._SP_CLIENT', None)
+class TestSecretPartyClientReuse(TestCase):
+    def test_client_is_reused(self):
+        with patch('reservations.config.SP_API_KEY', 'key'):
+            self.assertIs(sp_client(), sp_client())
+
+    def test_client_follows_api_key(self):
+        with patch('reservations.config.SP_API_KEY', 'key'):
+            client = sp_client()
+
+        with patch('reservations.config.SP_API_KEY', 'other'):
+            self.assertIsNot(sp_client(), client)
+            self.assertEqual(sp_client().api_key, 'other')
@@ -0,0 +1,38 @@
+import re
+
+from reservations.constants import FLOORPLANS, ROOM_LIST, ROOM_PRODUCTS
+
+# "NN.N Hotel - Description", a missing comma between two products in
+# ROOM_LIST would glue them into one string that fails this
+PRODUCT_RE = re.compile(r"\d{2}\.\d (Bally's|Nugget) - [^\n]+")
+
+
+class TestRoomList:
+    def test_products_are_well_formed(self):
+        for room_type, room_data in ROOM_LIST.items():
+            for product in room_data['rooms']:
+                assert PRODUCT_RE.fullmatch(product), f"{room_type}: {product}"
+                assert product.count(' - ') == 1, f"{room_type}: {product}"
+
+    def test_products_are_unique(self):
+        products = [product for room_data in ROOM_LIST.values() for product in room_data['rooms']]
+        assert len(products) == len(set(products))
+        assert ROOM_PRODUCTS == frozenset(products)
+
+
+class TestFloorplans:
+    def test_floors(self):
+        assert sorted(FLOORPLANS['ballys']) == list(range(3, 18))
+        assert sorted(FLOORPLANS['nugget']) == list(range(1, 9))
+
+    def test_ordinals(self):
+        assert FLOORPLANS['ballys'][3] == ["ballys_3rd.png", "ballys_3rd_thumb.png"]
+        assert FLOORPLANS['ballys'][11] == ["ballys_11th.png", "ballys_11th_thumb.png"]
+        assert FLOORPLANS['ballys'][12] == ["ballys_12th.png", "ballys_12th_thumb.png"]
+        assert FLOORPLANS['nugget'][1] == ["nugget_1st.png", "nugget_1st_thumb.png"]
+        assert FLOORPLANS['nugget'][2] == ["nugget_2nd.png", "nugget_2nd_thumb.png"]
+
+    def test_thumbnail_matches_floor(self):
+        for hotel, floors in FLOORPLANS.items():
+            for floor, (full, thumb) in floors.items():
+                assert thumb == full.replace('.png', '_thumb.png')
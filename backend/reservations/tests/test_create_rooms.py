@@ -0,0 +1,374 @@
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command, CommandError
+
+from reservations.helpers import egest_csv
+from reservations.models import Room, Guest, Staff
+from reservations.management.commands.create_rooms import remember, row_changed, undo
+
+FIELDS = ['Room', 'Room Type', 'Room Features (Accessibility, Lakeview, Smoking)',
+          'First Name (Resident)', 'Last Name (Resident)', 'Secondary Name',
+          'Check-In Date', 'Check-Out Date', 'Placed By', 'Ticket ID in SecretParty',
+          'Placed By Roombaht', 'Room Code']
+
+
+def room_row(number, first='', last='', ticket='', placed_by='', roombaht='True',
+             code='Ballys-K', features=''):
+    return {
+        'Room': str(number),
+        'Room Type': 'King',
+        'Room Features (Accessibility, Lakeview, Smoking)': features,
+        'First Name (Resident)': first,
+        'Last Name (Resident)': last,
+        'Secondary Name': '',
+        'Check-In Date': '',
+        'Check-Out Date': '',
+        'Placed By': placed_by,
+        'Ticket ID in SecretParty': ticket,
+        'Placed By Roombaht': roombaht,
+        'Room Code': code,
+    }
+
+
+class TestCreateRoomsCommand(TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.rooms_file = os.path.join(tmp_dir.name, 'rooms.csv')
+
+    def call_command(self, rows, *args, **kwargs):
+        egest_csv(rows, FIELDS, self.rooms_file)
+        out = StringIO()
+        call_command('create_rooms', self.rooms_file, *args, stdout=out, **kwargs)
+        return out.getvalue()
+
+    def test_creates_rooms(self):
+        self.call_command([room_row(301, features='Hearing Accessible'),
+                           room_row(302)], '--force')
+
+        self.assertEqual(Room.objects.count(), 2)
+        room = Room.objects.get(number=301)
+        self.assertEqual(room.name_take3, 'King')
+        self.assertEqual(room.name_hotel, 'Ballys')
+        self.assertTrue(room.is_hearing_accessible)
+        self.assertTrue(room.placed_by_roombot)
+        self.assertTrue(room.is_available)
+
+    def test_nugget_rooms(self):
+        self.call_command([room_row(501, code='GNLT-QQLV')], '--force', '--hotel-name', 'Nugget')
+
+        room = Room.objects.get(number=501)
+        self.assertEqual(room.name_hotel, 'Nugget')
+        self.assertEqual(room.name_take3, 'Double Queen Lakeview')
+
+    def test_unknown_hotel(self):
+        with self.assertRaisesRegex(CommandError, 'Unknown hotel name'):
+            self.call_command([room_row(301)], '--force', '--hotel-name', 'flamingo')
+
+    def test_room_features(self):
+        self.call_command([room_row(301, features='ADA, Lake View'),
+                           room_row(302, features='MountainView')], '--force')
+
+        lake_room = Room.objects.get(number=301)
+        self.assertTrue(lake_room.is_ada)
+        self.assertTrue(lake_room.is_lakeview)
+        self.assertFalse(lake_room.is_mountainview)
+        self.assertFalse(lake_room.is_hearing_accessible)
+        mountain_room = Room.objects.get(number=302)
+        self.assertTrue(mountain_room.is_mountainview)
+        self.assertFalse(mountain_room.is_ada)
+
+    def test_duplicate_rooms_refused(self):
+        with self.assertRaisesRegex(Exception, 'Duplicate room'):
+            self.call_command([room_row(301), room_row(301)], '--force')
+
+        self.assertFalse(Room.objects.exists())
+
+    def test_duplicate_tickets_refused(self):
+        with self.assertRaisesRegex(Exception, 'Duplicate ticket'):
+            self.call_command([room_row(301, 'Ada', 'Lovelace', 'ABC123', 'Placer', 'False'),
+                               room_row(302, 'Ada', 'Lovelace', 'ABC123', 'Placer', 'False')],
+                              '--force')
+
+    def test_rooms_without_tickets_are_not_duplicates(self):
+        self.call_command([room_row(301), room_row(302), room_row(303)], '--force')
+
+        self.assertEqual(Room.objects.count(), 3)
+
+    def test_preserve_associates_guest(self):
+        self.call_command([room_row(301)], '--force')
+        guest = Guest.objects.create(name='Ada Lovelace', email='ada@example.com', ticket='ABC123')
+
+        self.call_command([room_row(301, 'Ada', 'Lovelace', 'ABC123', 'Placer', 'False')],
+                          '--preserve', '--force')
+
+        room = Room.objects.get(number=301)
+        guest.refresh_from_db()
+        self.assertEqual(room.guest, guest)
+        self.assertEqual(room.primary, 'Ada Lovelace')
+        self.assertEqual(room.sp_ticket_id, 'ABC123')
+        self.assertFalse(room.is_available)
+        self.assertEqual(guest.room_number, '301')
+        self.assertEqual(guest.hotel, 'Ballys')
+
+    def test_preserve_moves_guest_out_of_old_room(self):
+        self.call_command([room_row(301, 'Ada', 'Lovelace', 'ABC123', 'Placer', 'False'),
+                           room_row(302)], '--force')
+        guest = Guest.objects.create(name='Ada Lovelace', email='ada@example.com', ticket='ABC123',
+                                     room_number='301', hotel='Ballys')
+        Room.objects.filter(number=301).update(guest=guest)
+
+        self.call_command([room_row(302, 'Ada', 'Lovelace', 'ABC123', 'Placer', 'False')],
+                          '--preserve', '--force', '--only-room', '302')
+
+        old_room = Room.objects.get(number=301)
+        new_room = Room.objects.get(number=302)
+        guest.refresh_from_db()
+        self.assertIsNone(old_room.guest)
+        self.assertTrue(old_room.is_available)
+        self.assertEqual(new_room.guest, guest)
+        self.assertEqual(guest.room_number, '302')
+
+    def test_preserve_loads_rooms_in_one_query(self):
+        rows = [room_row(number) for number in range(301, 311)]
+        self.call_command(rows, '--force')
+
+        with self.assertNumQueries(1):
+            self.call_command(rows, '--preserve', '--force')
+
+    def test_preserve_reuses_guests_loaded_with_rooms(self):
+        rows = [room_row(300 + idx, 'Guest', f'Number{idx}', f'TICKT{idx}', 'Placer', 'False')
+                for idx in range(1, 6)]
+        for idx in range(1, 6):
+            Guest.objects.create(name=f'Guest Number{idx}', email=f'guest{idx}@example.com',
+                                 ticket=f'TICKT{idx}')
+
+        self.call_command(rows, '--preserve', '--force')
+        self.assertEqual(Room.objects.filter(guest__isnull=False).count(), 5)
+
+        with self.assertNumQueries(1):
+            self.call_command(rows, '--preserve', '--force')
+
+    def test_preserve_frees_old_room_in_other_hotel(self):
+        guest = Guest.objects.create(name='Ada Lovelace', email='ada@example.com', ticket='ABC123',
+                                     room_number='501', hotel='Nugget')
+        Room.objects.create(number='501', name_take3='Queen Lakeview', name_hotel='Nugget',
+                            is_available=False, primary='Ada Lovelace', sp_ticket_id='ABC123',
+                            guest=guest)
+
+        self.call_command([room_row(301, 'Ada', 'Lovelace', 'ABC123', 'Placer', 'False')],
+                          '--preserve', '--force')
+
+        old_room = Room.objects.get(number='501', name_hotel='Nugget')
+        guest.refresh_from_db()
+        self.assertIsNone(old_room.guest)
+        self.assertTrue(old_room.is_available)
+        self.assertEqual(old_room.primary, '')
+        self.assertEqual(guest.room_number, '301')
+        self.assertEqual(guest.hotel, 'Ballys')
+
+    def test_changes_are_written_in_bulk(self):
+        rows = [room_row(number) for number in range(301, 321)]
+        with CaptureQueriesContext(connection) as ctx:
+            self.call_command(rows, '--force')
+
+        inserts = [x for x in ctx.captured_queries if x['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Room.objects.count(), 20)
+
+        rows = [room_row(number, 'Some', f'Body{number}', '', 'Placer', 'False')
+                for number in range(301, 321)]
+        with CaptureQueriesContext(connection) as ctx:
+            self.call_command(rows, '--preserve', '--force')
+
+        updates = [x for x in ctx.captured_queries if x['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Room.objects.filter(primary__startswith='Some Body').count(), 20)
+
+    @patch('reservations.management.commands.create_rooms.getch')
+    def test_quitting_keeps_accepted_changes(self, mock_getch):
+        self.call_command([room_row(301), room_row(302)], '--force')
+        mock_getch.side_effect = ['y', 'q']
+
+        with self.assertRaises(SystemExit):
+            self.call_command([room_row(301, 'Ada', 'Lovelace', '', 'Placer', 'False'),
+                               room_row(302, 'Grace', 'Hopper', '', 'Placer', 'False')],
+                              '--preserve')
+
+        self.assertEqual(Room.objects.get(number=301).primary, 'Ada Lovelace')
+        self.assertEqual(Room.objects.get(number=302).primary, '')
+
+    def ada_in_301(self):
+        self.call_command([room_row(301, 'Ada', 'Lovelace', 'ABC123', 'Placer', 'False'),
+                           room_row(302)], '--force')
+        guest = Guest.objects.create(name='Ada Lovelace', email='ada@example.com', ticket='ABC123',
+                                     room_number='301', hotel='Ballys')
+        Room.objects.filter(number=301).update(guest=guest)
+        return guest
+
+    @patch('reservations.management.commands.create_rooms.getch')
+    def test_declined_row_leaves_nothing_behind(self, mock_getch):
+        guest = self.ada_in_301()
+        mock_getch.side_effect = ['n', 'y']
+
+        # emptying 301 is declined, then a later row moves Ada out of 301 into 302
+        self.call_command([room_row(301, placed_by='Placer', roombaht='False'),
+                           room_row(302, 'Ada', 'Lovelace', 'ABC123', 'Placer', 'False')],
+                          '--preserve')
+
+        guest.refresh_from_db()
+        self.assertEqual(guest.room_number, '302')
+        self.assertEqual(Room.objects.get(number=302).guest, guest)
+        old_room = Room.objects.get(number=301)
+        self.assertIsNone(old_room.guest)
+        self.assertTrue(old_room.is_available)
+
+    @patch('reservations.management.commands.create_rooms.getch')
+    def test_declined_row_keeps_earlier_accepted_changes(self, mock_getch):
+        guest = self.ada_in_301()
+        mock_getch.side_effect = ['y', 'n']
+
+        # moving Ada to 302 frees 301, then a new resident for 301 is declined
+        self.call_command([room_row(302, 'Ada', 'Lovelace', 'ABC123', 'Placer', 'False'),
+                           room_row(301, 'Grace', 'Hopper', '', 'Placer', 'False')],
+                          '--preserve')
+
+        guest.refresh_from_db()
+        self.assertEqual(guest.room_number, '302')
+        self.assertEqual(Room.objects.get(number=302).guest, guest)
+        old_room = Room.objects.get(number=301)
+        self.assertIsNone(old_room.guest)
+        self.assertEqual(old_room.primary, '')
+        self.assertTrue(old_room.is_available)
+
+    @patch('reservations.management.commands.create_rooms.getch', return_value='y')
+    def test_dry_run_rows_start_from_loaded_state(self, mock_getch):
+        self.ada_in_301()
+
+        out = self.call_command([room_row(302, 'Ada', 'Lovelace', 'ABC123', 'Placer', 'False'),
+                                 room_row(301, placed_by='Placer', roombaht='False')],
+                                '--preserve', '--dry-run')
+
+        # emptying 301 still shows Ada moving out, not the first row's unsaved move
+        self.assertIn('301  King changes', out)
+        self.assertIn('Old Guest', out)
+        self.assertEqual(Room.objects.get(number=301).primary, 'Ada Lovelace')
+        mock_getch.assert_not_called()
+
+    def test_invalid_ticket_skipped(self):
+        self.call_command([room_row(301)], '--force')
+        Guest.objects.create(name='Ada Lovelace', email='ada@example.com', ticket='abc123')
+
+        out = self.call_command([room_row(301, 'Ada', 'Lovelace', 'abc123', 'Placer', 'False')],
+                                '--preserve', '--force')
+
+        self.assertIn('invalid sp_ticket_id', out)
+        self.assertIsNone(Room.objects.get(number=301).guest)
+
+    @patch('reservations.management.commands.create_rooms.getch', return_value='n')
+    def test_wipe_needs_confirmation(self, mock_getch):
+        self.call_command([room_row(301)], '--force')
+
+        with self.assertRaisesRegex(Exception, 'user said nope'):
+            self.call_command([room_row(302)])
+
+        mock_getch.assert_called_once()
+        self.assertTrue(Room.objects.filter(number=301).exists())
+
+    def test_verbose_output(self):
+        self.call_command([room_row(301)], '--force')
+
+        out = self.call_command([room_row(301)], '--preserve', '--force', verbosity=2)
+
+        self.assertIn('read in 1 rooms for Ballys', out)
+        self.assertIn('No changes to room 301', out)
+
+    def test_transfer_chain_walked_once(self):
+        self.call_command([room_row(301)], '--force')
+        original = Guest.objects.create(name='Ada Lovelace', email='ada@example.com', ticket='ABC123',
+                                        transfer='DEF456', room_number='301', hotel='Ballys')
+        Guest.objects.create(name='Grace Hopper', email='grace@example.com', ticket='DEF456')
+        Room.objects.filter(number=301).update(guest=original, primary='Ada Lovelace',
+                                               sp_ticket_id='ABC123', is_available=False)
+
+        with patch.object(Guest, 'chain', wraps=Guest.chain) as mock_chain:
+            out = self.call_command([room_row(301, 'Someone', 'Else', 'DEF456', 'Placer', 'False')],
+                                    '--preserve', '--force')
+
+        mock_chain.assert_called_once_with('DEF456')
+        self.assertIn('not being reconciled due to transfer DEF456', out)
+        self.assertEqual(Room.objects.get(number=301).guest, original)
+
+    def test_failed_load_keeps_wiped_data(self):
+        self.call_command([room_row(301)], '--force')
+
+        with patch.object(Room.objects, 'bulk_create', side_effect=Exception('boom')):
+            with self.assertRaisesRegex(CommandError, 'boom'):
+                self.call_command([room_row(302)], '--force')
+
+        self.assertEqual(list(Room.objects.values_list('number', flat=True)), ['301'])
+
+    def test_dry_run_shows_old_room_changes(self):
+        self.call_command([room_row(301, 'Ada', 'Lovelace', 'ABC123', 'Placer', 'False'),
+                           room_row(302)], '--force')
+        guest = Guest.objects.create(name='Ada Lovelace', email='ada@example.com', ticket='ABC123',
+                                     room_number='301', hotel='Ballys')
+        Room.objects.filter(number=301).update(guest=guest)
+
+        out = self.call_command([room_row(302, 'Ada', 'Lovelace', 'ABC123', 'Placer', 'False')],
+                                '--preserve', '--dry-run', '--only-room', '302')
+
+        old_room_out = out.split('Old Room\n')[1]
+        self.assertTrue(old_room_out.startswith('Ballys   301 '))
+        self.assertIsNone(Room.objects.get(number=302).guest)
+
+    def test_wipe_keeps_staff(self):
+        self.call_command([room_row(301)], '--force')
+        guest = Guest.objects.create(name='Ada Lovelace', email='ada@example.com', ticket='ABC123')
+        staff = Staff.objects.create(name='Ada Lovelace', email='ada@example.com', guest=guest)
+
+        self.call_command([room_row(302)], '--force')
+
+        staff.refresh_from_db()
+        self.assertIsNone(staff.guest)
+        self.assertFalse(Guest.objects.exists())
+        self.assertEqual(list(Room.objects.values_list('number', flat=True)), ['302'])
+
+
+class TestRowEdits(TestCase):
+    def setUp(self):
+        self.guest = Guest.objects.create(name='Ada Lovelace', email='ada@example.com', ticket='ABC123')
+        self.room = Room.objects.create(number='301', name_take3='King', name_hotel='Ballys',
+                                        primary='Ada Lovelace', guest=self.guest)
+
+    def test_changes_from_earlier_rows_are_not_this_rows(self):
+        # an earlier, accepted row freed the room but nothing is saved yet
+        self.room.guest = None
+        self.room.primary = ''
+        edits = {}
+        remember(edits, self.room)
+
+        self.assertTrue(self.room.is_dirty(check_relationship=True))
+        self.assertFalse(row_changed(edits, self.room))
+
+        self.room.secondary = 'Grace Hopper'
+        self.assertTrue(row_changed(edits, self.room))
+
+    def test_undo(self):
+        edits = {}
+        remember(edits, self.room)
+        self.room.guest = None
+        self.room.primary = ''
+        self.assertTrue(row_changed(edits, self.room))
+
+        undo(edits)
+
+        self.assertEqual(edits, {})
+        self.assertEqual(self.room.guest, self.guest)
+        self.assertEqual(self.room.primary, 'Ada Lovelace')
+        self.assertFalse(self.room.is_dirty(check_relationship=True))
@@ -0,0 +1,54 @@
+from io import StringIO
+from unittest.mock import patch
+from django.test import TestCase
+from django.core.management import call_command
+
+from reservations.services.guest_ingestion_service import GuestIngestionService
+
+TICKETS = [
+    {'code': 'ABC123', 'first_name': 'Newest', 'last_name': 'Guest', 'email': 'newest@example.com',
+     'product': {'name': 'Nugget - King'}},
+    {'code': 'DEF456', 'first_name': 'Oldest', 'last_name': 'Guest', 'email': 'oldest@example.com',
+     'product': {'name': 'Nugget - King'}},
+]
+
+
+@patch('reservations.management.commands.fetch_secret_party.SP_API_KEY', 'test_key')
+@patch.object(GuestIngestionService, 'fetch_secretparty_tickets')
+class TestFetchSecretPartyCommand(TestCase):
+    def call_command(self, *args):
+        out = StringIO()
+        err = StringIO()
+        call_command('fetch_secret_party', *args, stdout=out, stderr=err)
+        return out.getvalue()
+
+    @patch.object(GuestIngestionService, '_process_ingestion_data')
+    def test_tickets_fetched_once(self, mock_process, mock_fetch):
+        mock_fetch.return_value = list(TICKETS)
+        mock_process.return_value = {'success': True, 'total_processed': 2}
+
+        out = self.call_command()
+
+        mock_fetch.assert_called_once_with(force=False)
+        guests = mock_process.call_args[0][0]['guests']
+        self.assertEqual([x.ticket_code for x in guests], ['ABC123', 'DEF456'])
+        self.assertIn('Total guests processed: 2', out)
+
+    def test_no_cache(self, mock_fetch):
+        mock_fetch.return_value = []
+
+        self.call_command('--dry-run', '--no-cache')
+
+        mock_fetch.assert_called_once_with(force=True)
+
+    @patch.object(GuestIngestionService, 'ingest_from_external_source')
+    def test_dry_run_previews(self, mock_ingest, mock_fetch):
+        mock_fetch.return_value = list(TICKETS)
+
+        out = self.call_command('--dry-run')
+
+        mock_ingest.assert_not_called()
+        self.assertIn('1. Oldest Guest (oldest@example.com)', out)
+        self.assertIn('2. Newest Guest (newest@example.com)', out)
+        self.assertEqual(mock_fetch.return_value, TICKETS)
+        self.assertIn('Would process 2 tickets', out)
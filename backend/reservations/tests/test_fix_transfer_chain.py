@@ -0,0 +1,301 @@
+import logging
+from io import StringIO
+from unittest.mock import patch
+from django.test import TestCase
+from django.core.management import CommandError, call_command
+
+from reservations.models import Guest, Room
+from reservations.management.commands.fix_transfer_chain import TransferChainFixer
+
+
+def make_guest(ticket, transfer='', **kwargs):
+    return Guest.objects.create(name=f"Guest {ticket}",
+                                email=kwargs.pop('email', f"{ticket.lower()}@example.com"),
+                                ticket=ticket,
+                                transfer=transfer,
+                                **kwargs)
+
+
+class TestBuildFullChain(TestCase):
+    def setUp(self):
+        self.fixer = TransferChainFixer(logging.getLogger(__name__))
+        self.head = make_guest('T1')
+        self.middle = make_guest('T2', transfer='T1')
+        self.tail = make_guest('T3', transfer='T2')
+
+    def test_from_any_point(self):
+        for ticket in ['T1', 'T2', 'T3']:
+            chain, head, tail = self.fixer.build_full_chain(ticket)
+
+            self.assertEqual(chain, [self.head, self.middle, self.tail])
+            self.assertEqual(head, self.head)
+            self.assertEqual(tail, self.tail)
+
+    def test_untransferred_guest(self):
+        solo = make_guest('S1')
+
+        self.assertEqual(self.fixer.build_full_chain('S1'), ([solo], solo, solo))
+
+    def test_unknown_ticket(self):
+        with self.assertRaisesRegex(CommandError, 'No guest found with ticket T9'):
+            self.fixer.build_full_chain('T9')
+
+    def test_duplicate_ticket(self):
+        make_guest('T1', email='other@example.com')
+
+        with self.assertRaisesRegex(CommandError, 'Multiple guests found with ticket T1'):
+            self.fixer.build_full_chain('T3')
+
+    def test_broken_chain(self):
+        make_guest('B2', transfer='B1')
+
+        with self.assertRaisesRegex(CommandError, 'Broken chain: ticket B1 not found'):
+            self.fixer.build_full_chain('B2')
+
+    def test_branching_chain(self):
+        make_guest('T4', transfer='T2')
+
+        with self.assertRaisesRegex(CommandError, 'Multiple guests have transfer=T2'):
+            self.fixer.build_full_chain('T1')
+
+    def test_cycle(self):
+        make_guest('C1', transfer='C2')
+        make_guest('C2', transfer='C1')
+
+        with self.assertRaisesRegex(CommandError, 'Cycle detected at ticket C2'):
+            self.fixer.build_full_chain('C2')
+
+    def test_two_queries_for_any_length(self):
+        previous = 'T3'
+        for idx in range(4, 12):
+            make_guest(f"T{idx}", transfer=previous)
+            previous = f"T{idx}"
+
+        with self.assertNumQueries(2):
+            chain, head, tail = self.fixer.build_full_chain('T6')
+
+        self.assertEqual([x.ticket for x in chain], [f"T{idx}" for idx in range(1, 12)])
+        self.assertEqual(head, self.head)
+        self.assertEqual(tail.ticket, 'T11')
+
+
+class TestGetChanges(TestCase):
+    def setUp(self):
+        self.fixer = TransferChainFixer(logging.getLogger(__name__))
+        self.head = make_guest('T1', room_number='301', hotel='Ballys', can_login=True)
+        self.middle = make_guest('T2', transfer='T1')
+        self.tail = make_guest('T3', transfer='T2')
+        self.room = Room.objects.create(number='301', name_take3='King', name_hotel='Ballys',
+                                        primary='Guest T1', sp_ticket_id='T1', guest=self.head)
+        self.chain, _head, _tail = self.fixer.build_full_chain('T3')
+
+    def test_room_moves_to_tail(self):
+        with self.assertNumQueries(1):
+            changes = self.fixer.get_changes(self.chain, self.tail)
+
+        by_type = {}
+        for change in changes:
+            by_type.setdefault(change[0], []).append(change)
+
+        head_change, tail_change = by_type['guest']
+        self.assertEqual(head_change[1], self.head)
+        self.assertEqual(head_change[2], {'room_number': ('301', None),
+                                          'hotel': ('Ballys', None),
+                                          'can_login': (True, False)})
+        self.assertEqual(tail_change[1], self.tail)
+        self.assertEqual(tail_change[2], {'room_number': (None, '301'),
+                                          'hotel': (None, 'Ballys')})
+
+        [room_change] = by_type['room']
+        self.assertEqual(room_change[1], self.room)
+        self.assertEqual(room_change[2]['guest'], ('t1@example.com', 't3@example.com'))
+        self.assertEqual(room_change[2]['sp_ticket_id'], ('T1', 'T3'))
+        self.assertTrue(room_change[3]['is_correct_room'])
+
+    def test_duplicate_room_cleared(self):
+        other = Room.objects.create(number='302', name_take3='King', name_hotel='Ballys',
+                                    primary='Guest T2', sp_ticket_id='T2')
+
+        changes = self.fixer.get_changes(self.chain, self.tail)
+
+        room_changes = {x[1].number: x for x in changes if x[0] == 'room'}
+        self.assertTrue(room_changes['301'][3]['is_correct_room'])
+        self.assertTrue(room_changes['302'][3]['is_duplicate'])
+        self.assertEqual(room_changes['302'][1], other)
+        self.assertEqual(room_changes['302'][2]['sp_ticket_id'], ('T2', ''))
+
+    def test_room_guests_preloaded(self):
+        for number, guest in [('302', self.middle), ('303', self.tail), ('304', self.middle)]:
+            Room.objects.create(number=number, name_take3='King', name_hotel='Ballys',
+                                primary=guest.name, guest=guest)
+
+        with self.assertNumQueries(1):
+            changes = self.fixer.get_changes(self.chain, self.tail)
+
+        room_changes = {x[1].number: x[2]['guest'][0] for x in changes if x[0] == 'room'}
+        self.assertEqual(room_changes, {'301': 't1@example.com', '302': 't2@example.com',
+                                        '303': 't3@example.com', '304': 't2@example.com'})
+
+    def test_correct_chain_has_no_changes(self):
+        Guest.objects.filter(ticket='T1').update(room_number=None, hotel=None, can_login=False)
+        Guest.objects.filter(ticket='T3').update(room_number='301', hotel='Ballys')
+        Room.objects.filter(number='301').update(guest=self.tail, sp_ticket_id='T3', primary='Guest T3')
+        chain, _head, tail = self.fixer.build_full_chain('T3')
+
+        changes = self.fixer.get_changes(chain, tail)
+
+        self.assertEqual([x[0] for x in changes], ['room'])
+        self.assertEqual(changes[0][2]['sp_ticket_id'], ('T3', 'T3'))
+
+
+class TestChooseRoom(TestCase):
+    def setUp(self):
+        self.fixer = TransferChainFixer(logging.getLogger(__name__))
+        self.head = make_guest('T1')
+        self.middle = make_guest('T2', transfer='T1')
+        self.tail = make_guest('T3', transfer='T2')
+
+    def room(self, number, ticket, **kwargs):
+        return Room.objects.create(number=number, name_take3='King', name_hotel='Ballys',
+                                   sp_ticket_id=ticket, **kwargs)
+
+    def kept_room(self):
+        chain, _head, tail = self.fixer.build_full_chain('T1')
+        changes = self.fixer.get_changes(chain, tail)
+        if changes[0][0] == 'choose_room':
+            return None
+
+        [kept] = [x[1].number for x in changes if x[0] == 'room' and x[3].get('is_correct_room')]
+        return kept
+
+    def test_placed_beats_head(self):
+        self.room('301', 'T1')
+        self.room('302', 'T2', is_placed=True)
+
+        self.assertEqual(self.kept_room(), '302')
+
+    def test_several_placed_asks(self):
+        self.room('301', 'T1', is_placed=True)
+        self.room('302', 'T2', is_placed=True)
+
+        self.assertIsNone(self.kept_room())
+
+    def test_head_guest_fields(self):
+        Guest.objects.filter(ticket='T1').update(room_number='303', hotel='Ballys')
+        self.room('302', 'T2')
+
+        chain, _head, tail = self.fixer.build_full_chain('T1')
+        changes = self.fixer.get_changes(chain, tail)
+
+        [room_change] = [x for x in changes if x[0] == 'room']
+        self.assertTrue(room_change[3]['is_duplicate'])
+        self.assertIn(('guest', self.tail, {'room_number': (None, '303'), 'hotel': (None, 'Ballys')}, {}),
+                      changes)
+
+    def test_earliest_room(self):
+        self.room('302', 'T2')
+        self.room('303', 'T3')
+
+        self.assertEqual(self.kept_room(), '302')
+
+    def test_only_guest_fields_asks(self):
+        Guest.objects.filter(ticket='T2').update(room_number='302', hotel='Ballys')
+        Guest.objects.filter(ticket='T3').update(room_number='303', hotel='Ballys')
+
+        self.assertIsNone(self.kept_room())
+
+
+class TestApplyChanges(TestCase):
+    def setUp(self):
+        self.fixer = TransferChainFixer(logging.getLogger(__name__))
+        self.head = make_guest('T1', room_number='301', hotel='Ballys', can_login=True)
+        self.middle = make_guest('T2', transfer='T1', room_number='302', hotel='Ballys')
+        self.tail = make_guest('T3', transfer='T2')
+        self.room = Room.objects.create(number='301', name_take3='King', name_hotel='Ballys',
+                                        primary='Guest T1', sp_ticket_id='T1', guest=self.head)
+        chain, _head, self.tail = self.fixer.build_full_chain('T3')
+        self.changes = self.fixer.get_changes(chain, self.tail)
+
+    def test_one_update_per_model(self):
+        updated_at = self.room.updated_at
+
+        # savepoint, guest update, room update, release
+        with self.assertNumQueries(4):
+            results = self.fixer.apply_changes(self.changes, tail_guest=self.tail)
+
+        self.assertTrue(all(success for success, _msg in results))
+        self.assertIn((True, 'Updated Room Ballys 301'), results)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.guest, self.tail)
+        self.assertEqual(self.room.primary, 'Guest T3')
+        self.assertGreater(self.room.updated_at, updated_at)
+        self.assertEqual(list(Guest.objects.order_by('ticket').values_list('ticket', 'room_number', 'can_login')),
+                         [('T1', None, False), ('T2', None, False), ('T3', '301', False)])
+
+
+    def test_tail_reused_by_ticket(self):
+        self.tail.email = 'changed@example.com'
+
+        with self.assertNumQueries(4):
+            self.fixer.apply_changes(self.changes, tail_guest=self.tail)
+
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.guest, self.tail)
+
+    def test_guest_looked_up_without_tail(self):
+        # savepoint, tail lookup, guest update, room update, release
+        with self.assertNumQueries(5):
+            self.fixer.apply_changes(self.changes)
+
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.guest, self.tail)
+
+
+class TestCommand(TestCase):
+    def setUp(self):
+        self.head = make_guest('T1', room_number='301', hotel='Ballys', can_login=True)
+        self.tail = make_guest('T2', transfer='T1')
+        self.room = Room.objects.create(number='301', name_take3='King', name_hotel='Ballys',
+                                        primary='Guest T1', sp_ticket_id='T1', guest=self.head)
+
+    def test_force_fixes_chain(self):
+        out = StringIO()
+        call_command('fix_transfer_chain', 'T1', '--force', stdout=out)
+
+        self.assertIn('Completed fixes for ticket T1', out.getvalue())
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.guest, self.tail)
+        self.assertEqual(self.room.sp_ticket_id, 'T2')
+        self.tail.refresh_from_db()
+        self.assertEqual((self.tail.hotel, self.tail.room_number), ('Ballys', '301'))
+
+    def test_dry_run_changes_nothing(self):
+        call_command('fix_transfer_chain', 'T1', '--dry-run', stdout=StringIO())
+
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.guest, self.head)
+
+    @patch('reservations.management.commands.fix_transfer_chain.getch', return_value='y')
+    def test_confirmed_changes_applied(self, mock_getch):
+        out = StringIO()
+        call_command('fix_transfer_chain', 'T1', stdout=out)
+
+        self.assertIn('Completed fixes for ticket T1', out.getvalue())
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.guest, self.tail)
+
+    @patch('reservations.management.commands.fix_transfer_chain.getch')
+    def test_chain_changed_while_confirming(self, mock_getch):
+        def transfer_again():
+            make_guest('T3', transfer='T2')
+            return 'y'
+
+        # confirm after the chain moves on, then decline to carry on after the error
+        answers = iter([transfer_again, lambda: 'n'])
+        mock_getch.side_effect = lambda: next(answers)()
+        out = StringIO()
+        call_command('fix_transfer_chain', 'T1', stdout=out)
+
+        self.assertIn('Transfer chain for ticket T1 changed while waiting for confirmation', out.getvalue())
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.guest, self.head)
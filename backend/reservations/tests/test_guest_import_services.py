@@ -484,7 +484,8 @@ class TestGuestIngestionService(TestCase):
         mock_client.export_tickets.assert_called_once_with(
             search=[{"label": "type: add-on"}],
             reverse=True,
-            order='purchase_date'
+            order='purchase_date',
+            force=False
         )
 
         self.assertIn('tickets', result)
@@ -492,6 +493,16 @@ class TestGuestIngestionService(TestCase):
         self.assertEqual(len(result['tickets']), 2)
         self.assertEqual(result['metadata']['total_records'], 2)
 
+    @patch('reservations.services.guest_ingestion_service.SecretPartyClient')
+    def test_fetch_from_secretparty_with_tickets(self, mock_client_class):
+        tickets = [{'id': 'T123', 'email': 'test@example.com'}]
+
+        result = self.service._fetch_from_secretparty(tickets)
+
+        mock_client_class.assert_not_called()
+        self.assertIs(result['tickets'], tickets)
+        self.assertEqual(result['metadata']['total_records'], 1)
+
     @patch('reservations.services.guest_ingestion_service.ingest_csv')
     @patch('reservations.services.guest_ingestion_service.Path.exists')
     def test_fetch_from_csv_clean_data(self, mock_path_exists, mock_ingest_csv):
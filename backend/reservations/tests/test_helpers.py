@@ -1,9 +1,12 @@
 import datetime
+import re
+from smtplib import SMTPServerDisconnected
+from unittest.mock import Mock, patch
 
 import pytest
 
 
-from reservations.helpers import real_date
+from reservations.helpers import real_date, phrasing, ingest_csv, iter_csv, egest_csv, send_email, WORDS
 
 
 class TestRealDate:
@@ -25,6 +28,9 @@ class TestRealDate:
         assert real_date("Mon 11/14 Early", year=2025) == datetime.date(2025, 11, 14)
         assert real_date("Mon 11/14 Late", year=2025) == datetime.date(2025, 11, 14)
 
+    def test_mm_dd_without_year_uses_current_year(self):
+        assert real_date("11/14") == datetime.date(datetime.date.today().year, 11, 14)
+
     def test_iso_slash_year_first(self):
         assert real_date("2024/11/14") == datetime.date(2024, 11, 14)
 
@@ -37,3 +43,187 @@ class TestRealDate:
     def test_unparseable_raises(self):
         with pytest.raises(ValueError):
             real_date("not a date")
+
+    def test_weekday_dash_format(self):
+        assert real_date("Thu - 11/13", year=2025) == datetime.date(2025, 11, 13)
+
+    def test_common_formats_skip_dateparser(self):
+        with patch('dateparser.parse') as mock_parse:
+            assert real_date("Mon - 11/7", year=2025) == datetime.date(2025, 11, 7)
+            assert real_date("11/14/2024") == datetime.date(2024, 11, 14)
+            assert real_date("2024/11/14") == datetime.date(2024, 11, 14)
+
+        mock_parse.assert_not_called()
+
+    def test_other_formats_fall_back_to_dateparser(self):
+        assert real_date("November 14 2024") == datetime.date(2024, 11, 14)
+
+    def test_invalid_day_raises(self):
+        with pytest.raises(ValueError):
+            real_date("2/30", year=2025)
+
+    def test_repeated_dates_parse_once(self):
+        import dateparser
+        with patch('dateparser.parse', wraps=dateparser.parse) as mock_parse:
+            assert real_date("November 15 2024") == datetime.date(2024, 11, 15)
+            assert real_date("November 15 2024") == datetime.date(2024, 11, 15)
+
+        assert mock_parse.call_count == 1
+
+
+class TestPhrasing:
+    def test_word_list_is_loaded(self):
+        assert len(WORDS) == 1000
+        assert all(word[0].isupper() for word in WORDS)
+
+    def test_phrasing_is_built_from_words(self):
+        with patch('reservations.helpers.open') as mock_open:
+            phrase = phrasing()
+
+        mock_open.assert_not_called()
+        assert phrase[0].isupper()
+        assert any(phrase.startswith(word) for word in WORDS)
+
+    def test_phrasing_shapes(self):
+        words = f"(?:{'|'.join(map(re.escape, WORDS))})"
+        shape = re.compile(f"{words}{words}(?:\\d{{1,2}}|\\d{{1,2}}{words}|{words})")
+        for _ in range(100):
+            assert shape.fullmatch(phrasing())
+
+
+class TestIngestCsv:
+    def test_strips_keys_and_values(self):
+        fields, items = ingest_csv([" name , email ", "  Test Guest ,  guest@example.com  "])
+
+        assert fields == ["name", "email"]
+        assert items == [{"name": "Test Guest", "email": "guest@example.com"}]
+
+    def test_skips_comments_and_blank_lines(self):
+        fields, items = ingest_csv(["name,email", "", "# a comment", "Test Guest,guest@example.com"])
+
+        assert fields == ["name", "email"]
+        assert items == [{"name": "Test Guest", "email": "guest@example.com"}]
+
+    def test_short_rows_drop_missing_columns(self):
+        _fields, items = ingest_csv(["name,email,ticket", "Test Guest,guest@example.com"])
+
+        assert items == [{"name": "Test Guest", "email": "guest@example.com"}]
+
+    def test_quoted_values(self):
+        _fields, items = ingest_csv(['name,notes', '"Guest, Test","says ""hi"""'])
+
+        assert items == [{"name": "Guest, Test", "notes": 'says "hi"'}]
+
+    def test_reads_file(self, tmp_path):
+        csv_file = tmp_path / "guests.csv"
+        csv_file.write_text("name,email\nTest Guest,guest@example.com\n\n")
+
+        assert ingest_csv(str(csv_file)) == (["name", "email"],
+                                             [{"name": "Test Guest", "email": "guest@example.com"}])
+
+    def test_empty_input(self):
+        assert ingest_csv([]) == ([], [])
+
+    def test_reads_file_with_multiline_value(self, tmp_path):
+        csv_file = tmp_path / "rooms.csv"
+        csv_file.write_bytes(b'number,notes\r\n500,"line one\r\nline two"\r\n')
+
+        assert ingest_csv(str(csv_file)) == (["number", "notes"],
+                                             [{"number": "500", "notes": "line one\r\nline two"}])
+
+
+class TestIterCsv:
+    def test_yields_rows(self, tmp_path):
+        csv_file = tmp_path / "guests.csv"
+        csv_file.write_text("name,email\n# a comment\nTest Guest , guest@example.com\nOther,other@example.com\n")
+
+        rows = iter_csv(str(csv_file))
+
+        assert next(rows) == {"name": "Test Guest", "email": "guest@example.com"}
+        assert list(rows) == [{"name": "Other", "email": "other@example.com"}]
+
+    def test_empty_file(self, tmp_path):
+        csv_file = tmp_path / "empty.csv"
+        csv_file.write_text("")
+
+        assert list(iter_csv(str(csv_file))) == []
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(Exception, match="not found"):
+            iter_csv(str(tmp_path / "missing.csv"))
+
+    def test_unreadable_path(self, tmp_path):
+        with pytest.raises(IsADirectoryError):
+            iter_csv(str(tmp_path))
+
+
+class TestEgestCsv:
+    def test_round_trip(self, tmp_path):
+        csv_file = tmp_path / "rooms.csv"
+        items = [{"number": "500", "notes": "Guest, Test"}, {"number": "501", "notes": ""}]
+        egest_csv(items, ["number", "notes"], str(csv_file))
+
+        assert csv_file.read_bytes() == b'number,notes\r\n500,"Guest, Test"\r\n501,\r\n'
+        assert ingest_csv(str(csv_file)) == (["number", "notes"], items)
+
+
+@patch('reservations.config.SEND_MAIL', True)
+@patch('reservations.config.DEV_MAIL', '')
+class TestSendEmail:
+    def test_sends(self, mailoutbox):
+        assert send_email(['guest@example.com', 'other@example.com'], 'Subject', 'Body')
+
+        assert len(mailoutbox) == 1
+        assert mailoutbox[0].to == ['guest@example.com', 'other@example.com']
+
+    def test_disabled(self, mailoutbox):
+        with patch('reservations.config.SEND_MAIL', False):
+            assert send_email(['guest@example.com'], 'Subject', 'Body')
+
+        assert mailoutbox == []
+
+    def test_noop_without_dev_mail(self, mailoutbox):
+        assert send_email(['guest@example.com', 'test@noop.com'], 'Subject', 'Body')
+
+        assert mailoutbox == []
+
+    def test_noop_with_dev_mail(self, mailoutbox):
+        with patch('reservations.config.DEV_MAIL', 'dev@example.com'):
+            assert send_email(['guest@example.com', 'test@noop.com'], 'Subject', 'Body')
+
+        assert mailoutbox[0].to == ['guest@example.com', 'dev+test@example.com']
+
+    def test_noop_host_must_match(self, mailoutbox):
+        assert send_email(['guest@noop.company.com', 'test@NOOP.com'], 'Subject', 'Body')
+
+        assert mailoutbox == []
+        assert send_email(['guest@noop.company.com'], 'Subject', 'Body')
+        assert mailoutbox[0].to == ['guest@noop.company.com']
+
+    def test_attachments(self, mailoutbox, tmp_path):
+        report = tmp_path / "report.csv"
+        report.write_text("number\n500\n")
+
+        assert send_email(['guest@example.com'], 'Subject', 'Body',
+                          attachments=[str(report), str(tmp_path / "missing.csv")])
+
+        assert mailoutbox[0].attachments == [("report.csv", "number\n500\n", "text/csv")]
+
+    def test_reconnects_shared_connection(self):
+        connection = Mock()
+        connection.send_messages.side_effect = [SMTPServerDisconnected(), 1]
+
+        assert send_email(['guest@example.com'], 'Subject', 'Body', connection=connection)
+
+        connection.close.assert_called_once()
+        connection.open.assert_called_once()
+        assert connection.send_messages.call_count == 2
+
+    def test_reconnect_only_retried_once(self):
+        connection = Mock()
+        connection.send_messages.side_effect = SMTPServerDisconnected()
+
+        assert not send_email(['guest@example.com'], 'Subject', 'Body', connection=connection)
+
+        connection.open.assert_called_once()
+        assert connection.send_messages.call_count == 2
@@ -0,0 +1,86 @@
+import json
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from reservations import secret_party
+from reservations.secret_party import SecretPartyClient, SecretPartyAPIError
+
+
+@pytest.fixture
+def client(tmp_path):
+    with patch('reservations.config.CHECK_CACHE_DIR', str(tmp_path)):
+        yield SecretPartyClient()
+
+
+def write_cache(client, tickets, **params):
+    cache_file = client._cache_file_for_params(params.get('order'), params.get('reverse'), params.get('search'))
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    cache_file.write_text(json.dumps(tickets))
+    return cache_file
+
+
+class TestSecretPartyCache:
+    def test_reads_fresh_cache(self, client):
+        write_cache(client, [{'ticket_code': 'T100'}], order='last_name')
+
+        assert client.export_tickets(order='last_name') == [{'ticket_code': 'T100'}]
+
+    def test_expired_cache_requires_api_key(self, client):
+        cache_file = write_cache(client, [{'ticket_code': 'T100'}])
+        stale = time.time() - 7200
+        os.utime(cache_file, (stale, stale))
+
+        with pytest.raises(SecretPartyAPIError):
+            client.export_tickets()
+
+    def test_unchanged_cache_is_not_parsed_again(self, client):
+        write_cache(client, [{'ticket_code': 'T100'}])
+        client.export_tickets()
+
+        with patch('reservations.secret_party.json.loads') as mock_load:
+            tickets = client.export_tickets()
+
+        mock_load.assert_not_called()
+        assert tickets == [{'ticket_code': 'T100'}]
+
+    def test_rewritten_cache_is_parsed_again(self, client):
+        cache_file = write_cache(client, [{'ticket_code': 'T100'}])
+        client.export_tickets()
+
+        write_cache(client, [{'ticket_code': 'T200'}])
+        later = time.time() + 1
+        os.utime(cache_file, (later, later))
+
+        assert client.export_tickets() == [{'ticket_code': 'T200'}]
+
+    def test_callers_cannot_reorder_cached_tickets(self, client):
+        write_cache(client, [{'ticket_code': 'T100'}, {'ticket_code': 'T200'}])
+        client.export_tickets().reverse()
+
+        assert client.export_tickets() == [{'ticket_code': 'T100'}, {'ticket_code': 'T200'}]
+
+    def test_write_cache_round_trip(self, client):
+        cache_file = client._cache_file_for_params(None, None, None)
+        client._write_cache([{'ticket_code': 'T100'}], cache_file=cache_file)
+
+        assert json.loads(cache_file.read_text()) == [{'ticket_code': 'T100'}]
+        assert client.export_tickets() == [{'ticket_code': 'T100'}]
+
+    def test_fetched_tickets_are_reused_without_parsing(self, tmp_path):
+        with patch('reservations.config.CHECK_CACHE_DIR', str(tmp_path)):
+            client = SecretPartyClient(api_key='key')
+
+        with patch.object(client.session, 'post') as mock_post:
+            mock_post.return_value.status_code = 200
+            mock_post.return_value.json.return_value = {'tickets': [{'ticket_code': 'T100'}, {'ticket_code': 'T200'}]}
+            client.export_tickets(search=[{'label': 'status:active'}]).reverse()
+
+            with patch('reservations.secret_party.json.loads') as mock_load:
+                tickets = client.export_tickets(search=[{'label': 'status:active'}])
+
+        mock_post.assert_called_once()
+        mock_load.assert_not_called()
+        assert tickets == [{'ticket_code': 'T100'}, {'ticket_code': 'T200'}]
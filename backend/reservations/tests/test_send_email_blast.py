@@ -1,4 +1,5 @@
 import json
+from smtplib import SMTPServerDisconnected
 import tempfile
 from datetime import datetime
 from io import StringIO
@@ -354,3 +355,53 @@ class TestSendEmailBlastCommand(TestCase):
             assert mock_send_email.call_count == 1
             call_args = mock_send_email.call_args
             assert call_args[0][0] == ['bob@example.com']
+
+    @patch('reservations.management.commands.send_email_blast.send_email')
+    @patch('reservations.management.commands.send_email_blast.get_connection')
+    @patch('reservations.config.SEND_MAIL', True)
+    def test_single_connection(self, mock_get_connection, mock_send_email):
+        """Test every email in a blast goes out over one mail connection"""
+        with patch('reservations.management.commands.send_email_blast.STATE_FILE_PATH', self.state_file_path):
+            mock_send_email.return_value = True
+
+            call_command(
+                'send_email_blast',
+                '--template', 'test_blast.j2',
+                '--subject', 'Test Subject',
+                '--all',
+                '--batch-size', '10',
+                '--batch-time', '0',
+                stdout=StringIO()
+            )
+
+            connection = mock_get_connection.return_value
+            mock_get_connection.assert_called_once()
+            connection.open.assert_called_once()
+            connection.close.assert_called_once()
+            assert mock_send_email.call_count == 4
+            for call in mock_send_email.call_args_list:
+                assert call.kwargs['connection'] is connection
+
+    @patch('reservations.management.commands.send_email_blast.get_connection')
+    @patch('reservations.config.SEND_MAIL', True)
+    @patch('reservations.config.DEV_MAIL', '')
+    def test_disconnect_mid_blast(self, mock_get_connection):
+        """Test an email the server disconnects on is resent over a reopened session"""
+        connection = mock_get_connection.return_value
+        connection.send_messages.side_effect = [1, SMTPServerDisconnected(), 1, 1, 1]
+        with patch('reservations.management.commands.send_email_blast.STATE_FILE_PATH', self.state_file_path):
+            call_command(
+                'send_email_blast',
+                '--template', 'test_blast.j2',
+                '--subject', 'Test Subject',
+                '--all',
+                '--batch-size', '10',
+                '--batch-time', '0',
+                stdout=StringIO()
+            )
+
+            state = json.loads(self.state_file_path.read_text())
+            assert len(state['sent_emails']) == 4
+            assert state['failed_emails'] == []
+            assert connection.open.call_count == 2
+            assert connection.send_messages.call_count == 5
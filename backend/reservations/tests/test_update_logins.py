@@ -0,0 +1,52 @@
+from io import StringIO
+from django.test import TestCase
+from django.core.management import call_command
+
+from reservations.models import Room, Guest
+
+
+class TestUpdateLoginsCommand(TestCase):
+    def setUp(self):
+        self.guest = Guest.objects.create(name="Placed Guest",
+                                          email="placed@example.com",
+                                          ticket="T100",
+                                          jwt="placed_jwt",
+                                          room_number="500",
+                                          hotel="Ballys",
+                                          can_login=True)
+        Room.objects.create(number="500",
+                            name_take3="King",
+                            name_hotel="Ballys",
+                            primary="Placed Guest",
+                            sp_ticket_id="T100",
+                            guest=self.guest)
+
+    def call_command(self, *args, **kwargs):
+        out = StringIO()
+        call_command('update_logins', *args, stdout=out, **kwargs)
+        return out.getvalue()
+
+    def test_enables_other_records_for_same_email(self):
+        other = Guest.objects.create(name="Placed Guest", email="placed@example.com", ticket="T200", can_login=False)
+        stranger = Guest.objects.create(name="Stranger", email="stranger@example.com", ticket="T300", can_login=False)
+
+        out = self.call_command()
+
+        self.assertIn("Found 1 guests to update", out)
+        other.refresh_from_db()
+        stranger.refresh_from_db()
+        self.assertTrue(other.can_login)
+        self.assertFalse(stranger.can_login)
+
+    def test_dry_run(self):
+        other = Guest.objects.create(name="Placed Guest", email="placed@example.com", ticket="T200", can_login=False)
+
+        with self.assertNumQueries(1):
+            out = self.call_command('--dry-run')
+
+        self.assertIn("Dry run enabled", out)
+        other.refresh_from_db()
+        self.assertFalse(other.can_login)
+
+    def test_nothing_to_update(self):
+        self.assertIn("No guests to update", self.call_command())
@@ -0,0 +1,7 @@
+from reservations.permissions import FeatureEnabled
+
+
+class WaitTimeFeatureEnabled(FeatureEnabled):
+    """Return 501 if waittime feature is disabled"""
+    feature = 'waittime'
+    message = 'Wait time feature is not enabled'
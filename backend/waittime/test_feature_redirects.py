@@ -36,8 +36,8 @@ class WaitTimeFeatureRedirectTests(TestCase):
             time=30
         )
 
-    @patch('reservations.config.FEATURES', '')
-    @patch('waittime.views.logger')
+    @patch('reservations.config.FEATURES_SET', frozenset())
+    @patch('reservations.permissions.logger')
     def test_list_returns_501_when_feature_disabled(self, mock_logger):
         """Test that list endpoint returns 501 when waittime feature is disabled."""
         request = self.factory.get('/api/wait/')
@@ -52,8 +52,8 @@ class WaitTimeFeatureRedirectTests(TestCase):
         log_message = mock_logger.warning.call_args[0][0]
         self.assertIn('waittime', log_message.lower())
 
-    @patch('reservations.config.FEATURES', '')
-    @patch('waittime.views.logger')
+    @patch('reservations.config.FEATURES_SET', frozenset())
+    @patch('reservations.permissions.logger')
     def test_retrieve_returns_501_when_feature_disabled(self, mock_logger):
         """Test that retrieve endpoint returns 501 when waittime feature is disabled."""
         request = self.factory.get(f'/api/wait/{self.wait.short_name}/')
@@ -62,8 +62,8 @@ class WaitTimeFeatureRedirectTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
         mock_logger.warning.assert_called_once()
 
-    @patch('reservations.config.FEATURES', '')
-    @patch('waittime.views.logger')
+    @patch('reservations.config.FEATURES_SET', frozenset())
+    @patch('reservations.permissions.logger')
     def test_create_returns_501_when_feature_disabled(self, mock_logger):
         """Test that create endpoint returns 501 when waittime feature is disabled."""
         request = self.factory.post('/api/wait/', {
@@ -76,8 +76,8 @@ class WaitTimeFeatureRedirectTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
         mock_logger.warning.assert_called_once()
 
-    @patch('reservations.config.FEATURES', '')
-    @patch('waittime.views.logger')
+    @patch('reservations.config.FEATURES_SET', frozenset())
+    @patch('reservations.permissions.logger')
     def test_update_returns_501_when_feature_disabled(self, mock_logger):
         """Test that update endpoint returns 501 when waittime feature is disabled."""
         request = self.factory.put(f'/api/wait/{self.wait.short_name}/', {
@@ -90,8 +90,8 @@ class WaitTimeFeatureRedirectTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
         mock_logger.warning.assert_called_once()
 
-    @patch('reservations.config.FEATURES', '')
-    @patch('waittime.views.logger')
+    @patch('reservations.config.FEATURES_SET', frozenset())
+    @patch('reservations.permissions.logger')
     def test_destroy_returns_501_when_feature_disabled(self, mock_logger):
         """Test that destroy endpoint returns 501 when waittime feature is disabled."""
         request = self.factory.delete(f'/api/wait/{self.wait.short_name}/')
@@ -100,7 +100,7 @@ class WaitTimeFeatureRedirectTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
         mock_logger.warning.assert_called_once()
 
-    @patch('reservations.config.FEATURES', 'waittime')
+    @patch('reservations.config.FEATURES_SET', frozenset(['waittime']))
     def test_list_works_when_feature_enabled(self):
         """Test that list endpoint works normally when waittime feature is enabled."""
         request = self.factory.get('/api/wait/')
@@ -109,7 +109,7 @@ class WaitTimeFeatureRedirectTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertGreaterEqual(len(response.data), 1)
 
-    @patch('reservations.config.FEATURES', 'waittime')
+    @patch('reservations.config.FEATURES_SET', frozenset(['waittime']))
     def test_retrieve_works_when_feature_enabled(self):
         """Test that retrieve endpoint works normally when waittime feature is enabled."""
         request = self.factory.get(f'/api/wait/{self.wait.short_name}/')
@@ -8,6 +8,7 @@ from waittime.models import Wait
 from rest_framework import viewsets
 import reservations.config as roombaht_config
 from waittime.serializers import WaitViewSerializer, WaitListSerializer, WaitSerializer
+from waittime.permissions import WaitTimeFeatureEnabled
 
 logging.basicConfig(stream=sys.stdout, level=roombaht_config.LOGLEVEL)
 logger = logging.getLogger('ViewLogger_waittime')
@@ -16,28 +17,13 @@ class WaitViewSet(viewsets.ModelViewSet):
     queryset = Wait.objects.all()
     serializer_class = WaitSerializer
     lookup_field = 'short_name'
-
-    def _check_feature_enabled(self):
-        """Return 501 if waittime feature is disabled"""
-        if 'waittime' not in roombaht_config.FEATURES:
-            logger.warning("Access attempt to disabled feature: waittime")
-            return Response(
-                {'error': 'Wait time feature is not enabled'},
-                status=status.HTTP_501_NOT_IMPLEMENTED
-            )
-        return None
+    permission_classes = [WaitTimeFeatureEnabled]
 
     def list(self, request):
-        error = self._check_feature_enabled()
-        if error:
-            return error
         serializer = WaitListSerializer(self.get_queryset(), many=True)
         return Response(serializer.data)
 
     def retrieve(self, request, *args, **kwargs):
-        error = self._check_feature_enabled()
-        if error:
-            return error
         existing = self.get_object()
         serializer = WaitViewSerializer(existing)
         data = serializer.data
@@ -46,16 +32,7 @@ class WaitViewSet(viewsets.ModelViewSet):
 
         return Response(data)
 
-    def create(self, request, *args, **kwargs):
-        error = self._check_feature_enabled()
-        if error:
-            return error
-        return super().create(request, *args, **kwargs)
-
     def destroy(self, request, *args, **kwargs):
-        error = self._check_feature_enabled()
-        if error:
-            return error
         existing = self.get_object()
         if existing.password:
             if 'password' not in request.data:
@@ -67,9 +44,6 @@ class WaitViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_202_ACCEPTED)
 
     def update(self, request, *args, **kwargs):
-        error = self._check_feature_enabled()
-        if error:
-            return error
         existing = self.get_object()
         actual_data = request.data
 